@@ -0,0 +1,295 @@
+"""====================================================
+                    FUNCTION BENCHMARKS
+
+Times each of the public pyrpy functions over a range of input sizes, along
+with the equivalent raw scipy call, and checks the outputs of the functions
+against the stored reference values in reference/reference.json.
+
+Results can be written to a JSON file, and compared against the results of a
+previous run (eg from an earlier commit) to catch slowdowns, or speedups that
+broke accuracy.
+
+USAGE:
+    python benchmarks/bench_functions.py [--sizes 1 1e3 1e6 1e8]
+                                         [--funcs pnorm qbinom ...]
+                                         [--output results.json]
+                                         [--compare previous.json]
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+import scipy
+from scipy import special, stats
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import pyrpy
+
+__author__ = 'Ronny Restrepo'
+
+REFERENCE = os.path.join(ROOT, "benchmarks", "reference", "reference.json")
+DEFAULT_SIZES = [1, 10**3, 10**6]
+RTOL = 1e-12
+
+
+# ==============================================================================
+#                                                                     WORKLOADS
+# ==============================================================================
+def _values(rng, n, kind):
+    """ Random inputs of size n (a plain python scalar when n == 1) """
+    if kind == "x":
+        x = rng.normal(size=n)
+    elif kind == "p":
+        x = rng.random(size=n)
+    elif kind == "k":
+        x = rng.integers(0, 21, size=n).astype(float)
+    else:
+        raise ValueError(kind)
+    return float(x[0]) if n == 1 else x
+
+
+def workloads(rng, n):
+    """
+    Returns a dict, mapping the name of each public function to a pair of
+    callables that perform the same computation on inputs of size n, one
+    using pyrpy, and one using raw scipy.
+    """
+    x, p, k = (_values(rng, n, kind) for kind in ["x", "p", "k"])
+    vec = np.atleast_1d(x)
+    nn = rng.integers(0, 1000, size=n)
+    kk = nn // 3
+    if n == 1:
+        nn, kk = int(nn[0]), int(kk[0])
+    fac = rng.integers(0, 170, size=n) if n > 1 else 20
+    grp = rng.integers(0, 100, size=vec.size)
+    bins = np.arange(101) - 0.5
+    probs = np.linspace(0.005, 0.995, 100)
+    return {
+        "dnorm": (lambda: pyrpy.dnorm(x), lambda: stats.norm.pdf(x)),
+        "pnorm": (lambda: pyrpy.pnorm(x), lambda: stats.norm.cdf(x)),
+        "qnorm": (lambda: pyrpy.qnorm(p), lambda: stats.norm.ppf(p)),
+        "rnorm": (lambda: pyrpy.rnorm(n), lambda: stats.norm.rvs(size=n)),
+        "dbinom": (lambda: pyrpy.dbinom(k, 20, 0.3),
+                   lambda: stats.binom.pmf(k, 20, 0.3)),
+        "pbinom": (lambda: pyrpy.pbinom(k, 20, 0.3),
+                   lambda: stats.binom.cdf(k, 20, 0.3)),
+        "qbinom": (lambda: pyrpy.qbinom(p, 20, 0.3),
+                   lambda: stats.binom.ppf(p, 20, 0.3)),
+        "rbinom": (lambda: pyrpy.rbinom(n, 20, 0.3),
+                   lambda: stats.binom.rvs(20, 0.3, size=n)),
+        "dpois": (lambda: pyrpy.dpois(k, 4.5),
+                  lambda: stats.poisson.pmf(k, 4.5)),
+        "ppois": (lambda: pyrpy.ppois(k, 4.5),
+                  lambda: stats.poisson.cdf(k, 4.5)),
+        "qpois": (lambda: pyrpy.qpois(p, 4.5),
+                  lambda: stats.poisson.ppf(p, 4.5)),
+        "rpois": (lambda: pyrpy.rpois(n, 4.5),
+                  lambda: stats.poisson.rvs(4.5, size=n)),
+        "dt": (lambda: pyrpy.dt(x, 5), lambda: stats.t.pdf(x, 5)),
+        "pt": (lambda: pyrpy.pt(x, 5), lambda: stats.t.cdf(x, 5)),
+        "qt": (lambda: pyrpy.qt(p, 5), lambda: stats.t.ppf(p, 5)),
+        "rt": (lambda: pyrpy.rt(n, 5), lambda: stats.t.rvs(5, size=n)),
+        "mean": (lambda: pyrpy.mean(vec), lambda: stats.tmean(vec)),
+        "sd": (lambda: pyrpy.sd(vec), lambda: stats.tstd(vec)),
+        "quantile": (lambda: pyrpy.quantile(vec, probs),
+                     lambda: stats.scoreatpercentile(vec, 100 * probs)),
+        "tapply": (lambda: pyrpy.tapply(vec, grp, "mean"),
+                   lambda: stats.binned_statistic(grp, vec, "mean", bins)),
+        "choose": (lambda: pyrpy.choose(nn, kk),
+                   lambda: special.comb(nn, kk)),
+        "factorial": (lambda: pyrpy.factorial(fac),
+                      lambda: special.factorial(fac)),
+    }
+
+
+def best_time(func, repeat=3):
+    """ Best time per call (seconds) of func, over `repeat` runs """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run_timings(sizes, funcs=None, repeat=3):
+    """ Times pyrpy and scipy for each function and input size """
+    results = {}
+    for n in sizes:
+        rng = np.random.default_rng(0)
+        for name, (ours, theirs) in workloads(rng, n).items():
+            if funcs and name not in funcs:
+                continue
+            res = results.setdefault(name, {})[str(n)] = {}
+            for label, func in [("pyrpy", ours), ("scipy", theirs)]:
+                try:
+                    res[label] = best_time(func, repeat=repeat)
+                except Exception as e:
+                    res[label] = None
+                    res[label + "_error"] = "{}: {}".format(
+                        type(e).__name__, e)
+            if res["pyrpy"] and res["scipy"]:
+                res["speedup"] = res["scipy"] / res["pyrpy"]
+    return results
+
+
+# ==============================================================================
+#                                                                      ACCURACY
+# ==============================================================================
+def _decode(value):
+    """ Decodes a value from the reference file. Non finite values and large
+        integers are stored as strings.
+    """
+    if isinstance(value, str):
+        if value in ("Inf", "-Inf", "NaN", "NA"):
+            return float(value.replace("NA", "NaN"))
+        return int(value)
+    return value
+
+
+def _close(actual, expected, rtol=RTOL):
+    """ Compares a single output value against the reference value """
+    if isinstance(expected, int) and isinstance(actual, int):
+        return actual == expected
+    actual, expected = float(actual), float(expected)
+    if math.isnan(expected) or math.isnan(actual):
+        return math.isnan(expected) and math.isnan(actual)
+    if math.isinf(expected) or math.isinf(actual):
+        return actual == expected
+    return abs(actual - expected) <= rtol * abs(expected)
+
+
+def run_accuracy(path=REFERENCE, funcs=None, rtol=RTOL):
+    """ Checks the outputs of the functions against the reference values """
+    with open(path) as f:
+        reference = json.load(f)
+
+    results = {}
+    for case in reference["cases"]:
+        name = case["func"]
+        if funcs and name not in funcs:
+            continue
+        res = results.setdefault(name, {"cases": 0, "failed": 0,
+                                        "max_rel_err": 0.0, "failures": []})
+        res["cases"] += 1
+        expected = [_decode(v) for v in case["expected"]]
+        try:
+            actual = getattr(pyrpy, name)(**case["args"])
+            actual = [v.item() if hasattr(v, "item") else v
+                      for v in np.ravel(np.asarray(actual, dtype=object))]
+            ok = len(actual) == len(expected) and all(
+                _close(a, e, rtol) for a, e in zip(actual, expected))
+            for a, e in zip(actual, expected):
+                if e and not (isinstance(e, float) and math.isinf(e)):
+                    err = abs(float(a) - float(e)) / abs(float(e))
+                    if not math.isnan(err):
+                        res["max_rel_err"] = max(res["max_rel_err"], err)
+        except Exception as e:
+            ok = False
+            actual = "{}: {}".format(type(e).__name__, e)
+        if not ok:
+            res["failed"] += 1
+            res["failures"].append({"args": case["args"],
+                                    "expected": case["expected"],
+                                    "actual": str(actual)})
+    return results
+
+
+# ==============================================================================
+#                                                                        REPORT
+# ==============================================================================
+def _fmt(seconds):
+    if seconds is None:
+        return "error"
+    for unit, scale in [("s", 1), ("ms", 1e-3), ("us", 1e-6)]:
+        if seconds >= scale:
+            return "{:.3g}{}".format(seconds / scale, unit)
+    return "{:.3g}ns".format(seconds / 1e-9)
+
+
+def print_report(timings, accuracy, previous=None):
+    print("{:<11}{:>10}{:>11}{:>11}{:>9}{:>11}".format(
+        "function", "size", "pyrpy", "scipy", "speedup",
+        "vs prev" if previous else ""))
+    for name, by_size in timings.items():
+        for n, res in by_size.items():
+            change = ""
+            try:
+                old = previous["timings"][name][n]["pyrpy"]
+                change = "{:.2f}x".format(old / res["pyrpy"])
+            except (TypeError, KeyError, ZeroDivisionError):
+                pass
+            print("{:<11}{:>10}{:>11}{:>11}{:>9}{:>11}".format(
+                name, n, _fmt(res["pyrpy"]), _fmt(res["scipy"]),
+                "{:.1f}x".format(res["speedup"]) if "speedup" in res else "",
+                change))
+
+    print("\n{:<11}{:>7}{:>8}{:>14}".format("function", "cases", "failed",
+                                            "max rel err"))
+    for name, res in accuracy.items():
+        print("{:<11}{:>7}{:>8}{:>14.2e}".format(
+            name, res["cases"], res["failed"], res["max_rel_err"]))
+        for failure in res["failures"]:
+            print("    FAILED {} -> expected {}, got {}".format(
+                failure["args"], failure["expected"], failure["actual"]))
+
+
+def metadata():
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT,
+            stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        commit = None
+    return {"commit": commit,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "platform": platform.platform(),
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=float, nargs="+", default=DEFAULT_SIZES,
+                        help="input sizes to time (eg 1 1e3 1e6 1e8)")
+    parser.add_argument("--funcs", nargs="+", default=None,
+                        help="only benchmark these functions")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timing runs per measurement (best is kept)")
+    parser.add_argument("--output", default=None,
+                        help="path of a JSON file to write the results to")
+    parser.add_argument("--compare", default=None,
+                        help="JSON results of a previous run to compare to")
+    args = parser.parse_args(argv)
+
+    results = {"meta": metadata(),
+               "timings": run_timings([int(n) for n in args.sizes],
+                                      funcs=args.funcs, repeat=args.repeat),
+               "accuracy": run_accuracy(funcs=args.funcs),
+               }
+    previous = None
+    if args.compare is not None:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(results["timings"], results["accuracy"], previous=previous)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    failed = sum(res["failed"] for res in results["accuracy"].values())
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""====================================================
+                    IMPORT TIME BENCHMARK
+
+Measures the cold-start cost of importing pyrpy. Each scenario runs in a fresh
+python process, and records the wall clock time it took to run, along with
+the peak resident memory of that process.
+
+USAGE:
+    python benchmarks/bench_import.py [--repeat 5] [--output results.json]
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+__author__ = 'Ronny Restrepo'
+
+# Name of each scenario, and the code that gets run in the fresh process
+SCENARIOS = [
+    ("baseline python", "pass"),
+    ("import numpy", "import numpy"),
+    ("import pyrpy", "import pyrpy"),
+    ("pyrpy.pnorm", "import pyrpy; pyrpy.pnorm(1.96)"),
+    ("pyrpy.qt", "import pyrpy; pyrpy.qt(0.975, df=10)"),
+    ("pyrpy.mean", "import pyrpy; pyrpy.mean([1, 2, 3])"),
+    ("pyrpy.plot (loads matplotlib)", "import pyrpy; pyrpy.plot"),
+]
+
+# Runs the snippet, and reports back its own timing and peak memory, so that
+# the cost of spawning the interpreter is not mixed in with the results.
+TEMPLATE = """
+import resource, sys, time
+t0 = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - t0
+maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    maxrss = maxrss / 1024.0  # bytes on macOS, kilobytes on linux
+print(elapsed, maxrss, "matplotlib" in sys.modules, "scipy.stats" in sys.modules)
+"""
+
+
+def run_scenario(code, repeat=5):
+    """
+    Runs `code` in `repeat` fresh python processes.
+
+    :param code: (str) python code to run
+    :param repeat: (int) number of fresh processes to run it in.
+    :return: (dict) the best time (seconds), peak memory (MB) and which
+             heavy dependencies got loaded.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([root, env.get("PYTHONPATH", "")])
+    times, rss = [], []
+    for _ in range(repeat):
+        out = subprocess.check_output(
+            [sys.executable, "-c", TEMPLATE.format(code=code)], env=env)
+        elapsed, maxrss, mpl, stats = out.decode().split()
+        times.append(float(elapsed))
+        rss.append(float(maxrss) / 1024.0)
+    return {"time_s": min(times),
+            "peak_rss_mb": min(rss),
+            "matplotlib_loaded": mpl == "True",
+            "scipy_stats_loaded": stats == "True",
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="fresh processes per scenario (best is kept)")
+    parser.add_argument("--output", default=None,
+                        help="optional path of a JSON file to write results")
+    args = parser.parse_args(argv)
+
+    results = {}
+    print("{:<32}{:>10}{:>12}{:>12}{:>14}".format(
+        "scenario", "time (ms)", "peak (MB)", "matplotlib", "scipy.stats"))
+    for name, code in SCENARIOS:
+        res = run_scenario(code, repeat=args.repeat)
+        results[name] = res
+        print("{:<32}{:>10.1f}{:>12.1f}{:>12}{:>14}".format(
+            name, res["time_s"] * 1000, res["peak_rss_mb"],
+            str(res["matplotlib_loaded"]), str(res["scipy_stats_loaded"])))
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
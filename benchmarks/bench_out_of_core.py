@@ -0,0 +1,101 @@
+"""====================================================
+                    OUT OF CORE BENCHMARK
+
+Compares the throughput of mean() and sd() on a binary file of float64 values
+against the throughput of simply reading that file from disk.
+
+Note that unless the page cache is dropped between runs, the file will be
+read from memory rather than disk on all but the first pass.
+
+USAGE:
+    python benchmarks/bench_out_of_core.py [--gb 2] [--dir /tmp]
+                                           [--threads 4] [--output res.json]
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyrpy.mean import mean
+from pyrpy.sd import sd
+
+__author__ = 'Ronny Restrepo'
+
+GB = 2**30
+
+
+def write_file(path, nbytes, chunksize=2**24):
+    """ Writes `nbytes` of random float64 values to path, one chunk at a time
+    """
+    rng = np.random.default_rng(0)
+    n = nbytes // 8
+    with open(path, "wb") as f:
+        for start in range(0, n, chunksize):
+            chunk = rng.normal(1e6, 15.5, size=min(chunksize, n - start))
+            chunk.tofile(f)
+
+
+def read_file(path, bufsize=2**24):
+    """ Reads the file sequentially into a reusable buffer """
+    buf = bytearray(bufsize)
+    with open(path, "rb", buffering=0) as f:
+        while f.readinto(buf):
+            pass
+
+
+def timed(func, *args, **kwargs):
+    """ Returns the time (seconds) it takes to run func, and its output """
+    t0 = time.perf_counter()
+    out = func(*args, **kwargs)
+    return time.perf_counter() - t0, out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--gb", type=float, default=2.0,
+                        help="size of the test file in GB")
+    parser.add_argument("--dir", default=None,
+                        help="directory to create the test file in")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="threads used by mean() and sd()")
+    parser.add_argument("--output", default=None,
+                        help="optional path of a JSON file to write results")
+    args = parser.parse_args(argv)
+
+    fd, path = tempfile.mkstemp(suffix=".f64", dir=args.dir)
+    os.close(fd)
+    try:
+        nbytes = int(args.gb * GB)
+        write_file(path, nbytes)
+        results = {"gb": args.gb, "threads": args.threads}
+
+        elapsed, _ = timed(read_file, path)
+        results["read_gb_per_s"] = args.gb / elapsed
+
+        elapsed, value = timed(mean, path, threads=args.threads)
+        results["mean_gb_per_s"] = args.gb / elapsed
+        results["mean"] = float(value)
+
+        elapsed, value = timed(sd, path, threads=args.threads)
+        results["sd_gb_per_s"] = args.gb / elapsed
+        results["sd"] = float(value)
+    finally:
+        os.remove(path)
+
+    for key in ["read_gb_per_s", "mean_gb_per_s", "sd_gb_per_s"]:
+        print("{:<16}{:>8.2f} GB/s".format(key, results[key]))
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
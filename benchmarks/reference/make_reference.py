@@ -0,0 +1,246 @@
+"""====================================================
+                    MAKE REFERENCE
+
+Generates reference.json, the table of reference values that the outputs of
+the pyrpy functions are checked against by bench_functions.py.
+
+The values are computed in high precision arithmetic using mpmath (and exact
+rational arithmetic for the discrete distributions), and then rounded to
+float64, so they are what R's functions compute to within its own accuracy.
+When R is available, make_reference.R generates the same table using R
+itself.
+
+USAGE:
+    python benchmarks/reference/make_reference.py
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+import json
+import math
+import os
+from fractions import Fraction
+
+import mpmath as mp
+from scipy.stats import t as t_dist
+
+__author__ = 'Ronny Restrepo'
+
+mp.mp.dps = 50
+
+X_NORM = [-5.0, -1.5, 0.0, 0.3, 2.0, 10.0]
+P = [1e-10, 0.001, 0.025, 0.3, 0.5, 0.975, 0.999999]
+X_T = [-3.0, -1.0, 0.0, 0.5, 2.0, 6.0]
+VEC1 = [5, 10, 6, 9, 7, 8]
+VEC2 = [12, 11, 16, 14, 13, 10, 14, 15, 12]
+VEC3 = [1.5, -2.25, 100.0, 3.0, 0.5, 7.75, -40.0, 2.0, 2.5, 9.0, 1.0]
+
+
+# ==============================================================================
+#                                                          HIGH PRECISION FUNCS
+# ==============================================================================
+def _dnorm(x, mean, sd):
+    z = (mp.mpf(x) - mean) / sd
+    return mp.exp(-z * z / 2) / (sd * mp.sqrt(2 * mp.pi))
+
+
+def _pnorm(x, mean, sd, lowertail=True):
+    z = (mp.mpf(x) - mean) / sd
+    if not lowertail:
+        z = -z
+    return mp.erfc(-z / mp.sqrt(2)) / 2
+
+
+def _qnorm(p, mean, sd, lowertail=True):
+    p = mp.mpf(p)
+    z = mp.sqrt(2) * mp.erfinv(2 * p - 1)
+    if not lowertail:
+        z = -z
+    return mean + sd * z
+
+
+def _dt(x, df):
+    x, df = mp.mpf(x), mp.mpf(df)
+    return (mp.gamma((df + 1) / 2) / (mp.sqrt(df * mp.pi) * mp.gamma(df / 2))
+            * (1 + x * x / df) ** (-(df + 1) / 2))
+
+
+def _pt(x, df, lowertail=True):
+    x, df = mp.mpf(x), mp.mpf(df)
+    if not lowertail:
+        x = -x
+    tail = mp.betainc(df / 2, mp.mpf(1) / 2, 0, df / (df + x * x),
+                      regularized=True) / 2
+    return tail if x <= 0 else 1 - tail
+
+
+def _qt(p, df, lowertail=True):
+    p = mp.mpf(p)
+    if not lowertail:
+        p = 1 - p
+    if p == mp.mpf(1) / 2:
+        return mp.mpf(0)
+    # Start from the float64 answer of scipy, and polish it in high precision
+    start = t_dist.ppf(float(p), df)
+    return mp.findroot(lambda x: _pt(x, df) - p, mp.mpf(start), tol=1e-40)
+
+
+def _binom_pmf(size, prob):
+    prob = Fraction(prob)
+    return [math.comb(size, k) * prob**k * (1 - prob)**(size - k)
+            for k in range(size + 1)]
+
+
+def _pbinom(x, size, prob, lowertail=True):
+    pmf = _binom_pmf(size, prob)
+    k = math.floor(x)
+    lower = sum(pmf[:max(0, min(k, size) + 1)]) if k >= 0 else Fraction(0)
+    return lower if lowertail else 1 - lower
+
+
+def _qbinom(p, size, prob, lowertail=True):
+    pmf = _binom_pmf(size, prob)
+    p = Fraction(p)
+    cum = Fraction(0)
+    for k in range(size + 1):
+        cum += pmf[k]
+        # smallest k such that P(X <= k) >= p  (or P(X > k) <= p)
+        if (lowertail and cum >= p) or (not lowertail and 1 - cum <= p):
+            return k
+    return size
+
+
+def _tail_probs(type, conf):
+    alpha = 1 - conf
+    return {"less": (alpha, 1.0), "more": (0.0, conf),
+            "equal": (alpha / 2, 1 - alpha / 2)}[type]
+
+
+def _trimmed_mean(x, trim):
+    x = sorted(Fraction(v) for v in x)
+    lo = int(math.floor(len(x) * trim))
+    middle = x[lo: len(x) - lo]
+    return sum(middle) / len(middle)
+
+
+def _sd(x):
+    x = [Fraction(v) for v in x]
+    m = sum(x) / len(x)
+    return mp.sqrt(mp.mpf(sum((v - m)**2 for v in x) / (len(x) - 1)))
+
+
+# ==============================================================================
+#                                                                          CASES
+# ==============================================================================
+def _to_float(v):
+    if isinstance(v, Fraction):
+        return float(v)
+    if isinstance(v, int):
+        return v
+    v = float(v)
+    if math.isnan(v):
+        return "NaN"
+    if math.isinf(v):
+        return "Inf" if v > 0 else "-Inf"
+    return v
+
+
+def _log(v):
+    return mp.log(v) if v > 0 else mp.mpf("-inf")
+
+
+def make_cases():
+    cases = []
+
+    def add(func, args, expected):
+        cases.append({"func": func, "args": args,
+                      "expected": [_to_float(v) for v in expected]})
+
+    # Normal
+    for log in [False, True]:
+        add("dnorm", {"x": X_NORM, "mean": 1.5, "sd": 2, "log": log},
+            [_log(_dnorm(x, 1.5, 2)) if log else _dnorm(x, 1.5, 2)
+             for x in X_NORM])
+        for lowertail in [True, False]:
+            vals = [_pnorm(x, 1.5, 2, lowertail) for x in X_NORM]
+            add("pnorm", {"x": X_NORM, "mean": 1.5, "sd": 2,
+                          "lowertail": lowertail, "log": log},
+                [_log(v) for v in vals] if log else vals)
+    for lowertail in [True, False]:
+        add("qnorm", {"q": P, "mean": 1.5, "sd": 2, "lowertail": lowertail},
+            [_qnorm(p, 1.5, 2, lowertail) for p in P])
+    for type, conf in [("equal", 0.99), ("less", 0.95), ("more", 0.90)]:
+        pl, pu = _tail_probs(type, conf)
+        add("cnorm", {"mean": 50, "sd": 15.5, "type": type, "conf": conf},
+            [_qnorm(p, 50, 15.5) if 0 < p < 1 else mp.inf * (2 * p - 1)
+             for p in (pl, pu)])
+
+    # Binomial
+    x_binom = list(range(-1, 13))
+    for log in [False, True]:
+        pmf = _binom_pmf(11, 0.3)
+        vals = [pmf[x] if 0 <= x <= 11 else Fraction(0) for x in x_binom]
+        add("dbinom", {"x": x_binom, "size": 11, "prob": 0.3, "log": log},
+            [_log(mp.mpf(v)) for v in vals] if log else vals)
+    for lowertail in [True, False]:
+        add("pbinom", {"x": x_binom, "size": 11, "prob": 0.3,
+                       "lowertail": lowertail},
+            [_pbinom(x, 11, 0.3, lowertail) for x in x_binom])
+    q_binom = [0.0, 0.01, 0.2, 0.5, 0.97, 1.0]
+    for lowertail in [True, False]:
+        add("qbinom", {"q": q_binom, "size": 11, "prob": 0.3,
+                       "lowertail": lowertail},
+            [_qbinom(q, 11, 0.3, lowertail) for q in q_binom])
+    for type, conf in [("equal", 0.99), ("less", 0.95), ("more", 0.90)]:
+        add("cbinom", {"size": 100, "prob": 0.7, "type": type, "conf": conf},
+            [_qbinom(p, 100, 0.7) for p in _tail_probs(type, conf)])
+
+    # t
+    for df in [1, 4.5, 30]:
+        add("dt", {"x": X_T, "df": df}, [_dt(x, df) for x in X_T])
+        for lowertail in [True, False]:
+            add("pt", {"x": X_T, "df": df, "lowertail": lowertail},
+                [_pt(x, df, lowertail) for x in X_T])
+    for df in [3, 10]:
+        for lowertail in [True, False]:
+            add("qt", {"q": P, "df": df, "lowertail": lowertail},
+                [_qt(p, df, lowertail) for p in P])
+    for type, conf in [("equal", 0.99), ("less", 0.95), ("more", 0.90)]:
+        add("ct", {"df": 15, "type": type, "conf": conf},
+            [_qt(p, 15) if 0 < p < 1 else mp.inf * (2 * p - 1)
+             for p in _tail_probs(type, conf)])
+
+    # Summary statistics
+    for x in [VEC1, VEC2, VEC3]:
+        add("mean", {"x": x}, [_trimmed_mean(x, 0)])
+        add("sd", {"x": x}, [_sd(x)])
+    for trim in [0.1, 0.2, 0.5]:
+        add("mean", {"x": VEC3, "trim": trim}, [_trimmed_mean(VEC3, trim)
+                                                if trim < 0.5 else
+                                                Fraction(sorted(VEC3)[5])])
+    # A matrix with no columns still has a (nan) result for each row
+    add("rowMeans", {"x": [[], [], []]}, [mp.nan] * 3)
+    add("sd", {"x": [[], [], []], "axis": 1}, [mp.nan] * 3)
+
+    # Combinatorics
+    for n, k in [(10, 3), (50, 25), (60, 30)]:
+        add("choose", {"n": n, "k": k}, [math.comb(n, k)])
+        add("npk", {"n": n, "k": k}, [math.perm(n, k)])
+    for n in [0, 5, 20, 25]:
+        add("factorial", {"n": n}, [math.factorial(n)])
+    return cases
+
+
+def main():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "reference.json")
+    reference = {"source": "mpmath {} ({} digits) / exact rationals".format(
+                     mp.__version__, mp.mp.dps),
+                 "cases": make_cases()}
+    with open(path, "w") as f:
+        json.dump(reference, f, indent=1)
+    print("Wrote {} cases to {}".format(len(reference["cases"]), path))
+
+
+if __name__ == '__main__':
+    main()
@@ -41,6 +41,12 @@ Central Tendency
     mode
     median
 
+Quantiles
+----------------
+.. autosummary::
+   :toctree: generated/
+    quantile
+
 Deviation
 -----------------
 .. autosummary::
@@ -63,29 +69,99 @@ Combinatorics
     choose
     nck
     npk
+    lchoose
+    lfactorial
+
+Special Functions
+-------
+.. autosummary::
+   :toctree: generated/
+    lgamma
+    lbeta
 
 """
 from __future__ import division, print_function, absolute_import
 
 __author__ = 'Ronny Restrepo'
-__all__ = ["mean", "sd", "sort", "c", "nck", "choose", "npk", "factorial"]
-
-# selected functions from files
-from pyrpy.norm import cnorm, rnorm, qnorm, pnorm, dnorm
-from pyrpy.binom import cbinom, rbinom, qbinom, pbinom, dbinom
-from pyrpy.t import ct, rt, qt, pt, dt
-from pyrpy.mean import mean
-from pyrpy.sd import sd
+__all__ = ["mean", "sd", "sort", "c", "nck", "choose", "npk", "factorial",
+           "lchoose", "lfactorial", "lgamma", "lbeta"]
 
-# Plots
-from pyrpy.plot import plot
-from pyrpy.plot_density import plot_density
-from pyrpy.plot_distribution import plot_distribution
-from pyrpy.plot_hypothesis import plot_hypothesis
+import importlib
+import math
+import sys
+import types
 
 import numpy as np
-from scipy.misc import comb
-from scipy.misc import factorial as spfactorial
+from pyrpy.instrument import instrument as _instrument
+
+# ==============================================================================
+#                                                                   LAZY IMPORTS
+# ==============================================================================
+# Public names that live in submodules, mapped to the submodule that defines
+# them. The submodules (and the scipy.stats / matplotlib imports they make) are
+# only loaded the first time one of these names is accessed, so that eg a
+# process that only ever calls pnorm() never pays for importing matplotlib.
+_LAZY_ATTRS = {
+    # selected functions from files
+    "cnorm": "norm", "rnorm": "norm", "qnorm": "norm", "pnorm": "norm",
+    "dnorm": "norm",
+    "cbinom": "binom", "rbinom": "binom", "qbinom": "binom",
+    "pbinom": "binom", "dbinom": "binom",
+    "binom_cache": "binom", "binom_cache_info": "binom",
+    "cpois": "pois", "rpois": "pois", "qpois": "pois", "ppois": "pois",
+    "dpois": "pois", "pois_cache": "pois", "pois_cache_info": "pois",
+    "ct": "t", "rt": "t", "qt": "t", "pt": "t", "dt": "t",
+    "mean": "mean",
+    "sd": "sd",
+    "colSums": "colstats", "colMeans": "colstats", "colSds": "colstats",
+    "rowSums": "colstats", "rowMeans": "colstats", "rowSds": "colstats",
+    "tapply": "tapply", "aggregate": "tapply",
+    "quantile": "quantile", "median": "quantile",
+    "t_test": "t_test", "t_test_summary": "t_test",
+    "boot": "boot", "boot_ci": "boot", "jackknife": "boot",
+    "Accumulator": "accumulator",
+    "set_seed": "rng", "spawn_rngs": "rng", "rparallel": "rng",
+    "density": "density", "bw_nrd0": "density", "bw_nrd": "density",
+    "bw_sj": "density",
+    "distribution_curve": "distribution_curve",
+
+    # Plots
+    "plot": "plot",
+    "plot_density": "plot_density",
+    "plot_distribution": "plot_distribution",
+    "plot_hypothesis": "plot_hypothesis",
+    "render_batch": "render",
+}
+
+
+def __getattr__(name):
+    """ Loads the submodule for a public name on first access (PEP 562). """
+    try:
+        module_name = _LAZY_ATTRS[name]
+    except KeyError:
+        raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name))
+    module = importlib.import_module("{}.{}".format(__name__, module_name))
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
+
+class _LazyModule(types.ModuleType):
+    def __setattr__(self, name, value):
+        # Importing a submodule binds it as an attribute of the package, eg
+        # `pyrpy.mean`. Don't let that shadow the public function of the same
+        # name, which gets bound by __getattr__ instead.
+        if name in _LAZY_ATTRS and isinstance(value, types.ModuleType):
+            return
+        super(_LazyModule, self).__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _LazyModule
 
 
 # ==============================================================================
@@ -142,7 +218,8 @@ def _template(x, arg2, arg3):
 
 
 
-def sort(x, decreasing=False, na_last=None):
+@_instrument
+def sort(x, decreasing=False, na_last=None, partial=None):
     """
     ============================================================================
                                                                             SORT
@@ -151,93 +228,387 @@ def sort(x, decreasing=False, na_last=None):
 
     :param x: list or array of numbers that you want to sort.
     :param decreasing: bool. Should you order in descending order?
-    :param nalast: Handling of missing values. If True, they are placed last.
+    :param na_last: Handling of missing values. If True, they are placed last.
                    if False, they are placed first. If None, they are removed.
-                   NOTE: this has not been implemented yet.
-    :return: The list with the items ordered.
+    :param partial: None, or an int (or list of ints) of the 1-based positions
+                   that should end up with their sorted values, with all the
+                   smaller values before them, and all the larger values
+                   after (in no particular order). This uses partitioning,
+                   which is much faster than a full sort, eg to find the top
+                   k values. Can not be used with decreasing=True.
+    :return: The array with the items ordered.
     ============================================================================
     """
-    # TODO: implement nalast option
-    return c(sorted(x, reverse=decreasing))
-
-
+    x = np.asarray(x).ravel()
+    if x.dtype.kind in "fc":
+        missing = np.isnan(x)
+        nas = x[missing]
+        if nas.size:
+            x = x[~missing]
+    else:
+        nas = x[:0]
+
+    if partial is not None:
+        if decreasing:
+            raise ValueError("unsupported options for partial sorting")
+        y = np.partition(x, np.asarray(partial, dtype=np.intp).ravel() - 1)
+    else:
+        y = np.sort(x)
+        if decreasing:
+            y = y[::-1]
+
+    if na_last is None or nas.size == 0:
+        return y
+    return np.concatenate([y, nas] if na_last else [nas, y])
+
+
+@_instrument
 def c(*args):
     """
     ============================================================================
                                                                                C
     ============================================================================
-    Creates an array (vector)
-    NOTE: Do not try concatenating arrays using this. That feature has not been
-    implemented yet. You will end up with a multidimensional array if you do.
+    Creates an array (vector) by combining its arguments.
+
+    Each argument can be a single value, or a list or array of values (which
+    get flattened), and they are all concatenated into a single 1D array,
+    eg c(1, [2, 3], np.array([[4, 5]])) gives array([1, 2, 3, 4, 5]).
+    The values are converted to a common type, like in R (eg ints and floats
+    give floats, numbers and strings give strings). If there is none (eg for
+    None values), then it returns an array of objects.
 
     :param args: The elements of your array
     :return: An array
     ============================================================================
     """
-    # TODO: implement concatenation of arrays in c()
-    return np.array(args)
+    arrays = [np.asarray(a) for a in args]
+    if not arrays:
+        return np.array([])
+    try:
+        dtype = np.result_type(*arrays)
+    except TypeError:
+        dtype = np.dtype(object)
+
+    # Copy each argument straight into its slice of a preallocated array
+    out = np.empty(sum(a.size for a in arrays), dtype=dtype)
+    start = 0
+    for a in arrays:
+        out[start:start + a.size] = a.ravel()
+        start += a.size
+    return out
 
 
 # Permutations and Combinations
+@_instrument
 def nck(n, k, exact=False):
     """
     ============================================================================
                                                                              NCK
     ============================================================================
-    n choose k
+    n choose k. Same as choose()
 
     :param n (int):
     :param k (int):
     :param exact (bool):
-    :return (int, long): integer for smaller numbers, Long for larger numbers
+    :return (float, int or array): see choose()
     ============================================================================
     """
-    return(int(round(comb(n, k, exact=exact))))
+    return _choose(n, k, exact=exact)
 
+@_instrument
 def choose(n, k, exact=False):
     """
     ============================================================================
                                                                           CHOOSE
     ============================================================================
-    n choose k
+    n choose k. The number of ways of choosing k items out of n.
+
+    n and k can be single values or arrays, which get broadcast against each
+    other. As in R, k gets rounded to an integer, the result is 0 for k < 0,
+    and negative n are supported (choose(n, k) = (-1)^k choose(k - n - 1, k)).
 
     :param n (int):
     :param k (int):
-    :param exact (bool):
-    :return (int, long): integer for smaller numbers, Long for larger numbers
+    :param exact (bool): If False (default), then it is computed in floating
+        point, which is fast for large arrays, and gets rounded to a whole
+        number when n is an integer. If True, then n and k must be integers,
+        and it is computed exactly, as an arbitrarily large python int (or an
+        object array of python ints, for array arguments).
+    :return (float, int or array): float (or array of floats) by default.
     ============================================================================
     """
-    return(int(round(comb(n, k, exact=exact))))
+    return _choose(n, k, exact=exact)
 
 
+@_instrument
 def npk(n, k, exact=False):
     """
     ============================================================================
                                                                              NPK
     ============================================================================
-    n perm k. Permutations
+    n perm k. Permutations. The number of ways of choosing k items out of n,
+    where the order matters, ie n! / (n - k)!
+
+    n and k can be single values or arrays, which get broadcast against each
+    other.
 
     :param n (int):
     :param k (int):
-    :param exact (bool):
-    :return (int, long): integer for smaller numbers, Long for larger numbers
+    :param exact (bool): If False (default), then it is computed in floating
+        point (rounded to a whole number when n is an integer). If True, then
+        n and k must be integers, and it is computed exactly, as an
+        arbitrarily large python int (or an object array of python ints).
+    :return (float, int or array): float (or array of floats) by default.
     ============================================================================
     """
-    return(int(round(nck(n, k, exact=exact) * factorial(k, exact))))
+    if exact:
+        return _exact(_perm, n, k)
+    from scipy.special import poch
+    n = np.asarray(n, dtype=float)
+    k = np.round(np.asarray(k, dtype=float))
+    out = np.where(k < 0, 0.0, poch(n - k + 1, k))
+    return _round_if_int(out, n)
 
 
+@_instrument
 def factorial(n, exact=False):
     """
     ============================================================================
                                                                        FACTORIAL
     ============================================================================
-    factorial
-    :param n:
-    :param exact:
-    :return (int, long): integer for smaller numbers, Long for larger numbers
+    factorial. Same as gamma(n + 1), so it is also defined for non integer n.
+
+    :param n: a single value, or an array of values.
+    :param exact (bool): If False (default), then it is computed in floating
+        point (exactly rounded from a table, for integers up to 170). It is
+        nan for negative integers, and inf beyond 170. If True, then n must be
+        a non negative integer, and it is computed exactly, as an arbitrarily
+        large python int (or an object array of python ints).
+    :return (float, int or array): float (or array of floats) by default.
+    ============================================================================
+    """
+    if exact:
+        return _exact(math.factorial, n)
+    from scipy.special import gamma
+    if n.__class__ in _SCALAR_TYPES and 0 <= n < len(_FACTORIALS) \
+            and n == int(n):
+        return _FACTORIALS[int(n)]
+
+    n = np.asarray(n, dtype=float)
+    out = gamma(n + 1)
+    # Use the exactly rounded values for whole numbers in the table
+    whole = (n == np.round(n)) & (n >= 0) & (n < len(_FACTORIALS))
+    out = np.where(whole, _FACTORIALS[np.where(whole, n, 0).astype(np.intp)],
+                   out)
+    out = np.where((n < 0) & (n == np.round(n)), np.nan, out)
+    return out[()]
+
+
+# Log space combinatorics and gamma functions
+@_instrument
+def lchoose(n, k):
+    """
+    ============================================================================
+                                                                         LCHOOSE
+    ============================================================================
+    Natural log of the absolute value of choose(n, k), computed without
+    overflow. Same as R's lchoose(), including its conventions: k gets rounded
+    to an integer, the result is -inf for k < 0 (and for integers n < k), and
+    negative n are supported.
+
+    :param n: a single value, or an array of values
+    :param k: a single value, or an array of values (broadcast against n)
+    :return (float or array):
+    ============================================================================
+    """
+    from scipy.special import gammaln
+    n = np.asarray(n, dtype=float)
+    k = np.round(np.asarray(k, dtype=float))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # lchoose(n, k) = lchoose(k - n - 1, k) for negative n
+        m = np.where((n < 0) & (k >= 2), k - n - 1, n)
+        isint = m == np.round(m)
+        out = np.where(isint | (m >= k - 1),
+                       -np.log(m + 1) - _lbeta(m - k + 1, k + 1),
+                       gammaln(m + 1) - gammaln(k + 1) - gammaln(m - k + 1))
+        # Exact values where the above formulas lose accuracy, by symmetry
+        out = np.where(isint & (m - k == 1), np.log(m), out)
+        out = np.where(isint & (m == k), 0.0, out)
+        out = np.where(isint & (m < k), -np.inf, out)
+        out = np.where(k == 1, np.log(np.abs(n)), out)
+        out = np.where(k == 0, 0.0, out)
+        out = np.where(k < 0, -np.inf, out)
+    return np.where(np.isnan(n) | np.isnan(k), np.nan, out)[()]
+
+
+@_instrument
+def lfactorial(x):
+    """
+    ============================================================================
+                                                                      LFACTORIAL
+    ============================================================================
+    Natural log of the factorial of x, ie lgamma(x + 1), computed without
+    overflow. Same as R's lfactorial().
+
+    :param x: a single value, or an array of values
+    :return (float or array):
+    ============================================================================
+    """
+    from scipy.special import gammaln
+    return gammaln(np.asarray(x, dtype=float) + 1)[()]
+
+
+@_instrument
+def lgamma(x):
+    """
+    ============================================================================
+                                                                          LGAMMA
+    ============================================================================
+    Natural log of the absolute value of the gamma function of x. Same as R's
+    lgamma(). It is inf at 0 and the negative integers.
+
+    :param x: a single value, or an array of values
+    :return (float or array):
     ============================================================================
     """
-    return(int(round(spfactorial(n, exact))))
+    from scipy.special import gammaln
+    return gammaln(np.asarray(x, dtype=float))[()]
+
+
+@_instrument
+def lbeta(a, b):
+    """
+    ============================================================================
+                                                                           LBETA
+    ============================================================================
+    Natural log of the beta function, B(a, b) = gamma(a) gamma(b) /
+    gamma(a + b), computed without overflow. Same as R's lbeta(), so it is
+    nan if a or b are negative, and inf if either of them is 0.
+
+    :param a: a single value, or an array of values
+    :param b: a single value, or an array of values (broadcast against a)
+    :return (float or array):
+    ============================================================================
+    """
+    return _lbeta(np.asarray(a, dtype=float), np.asarray(b, dtype=float))[()]
+
+
+def _lbeta(a, b):
+    """ Vectorized version of the algorithm of R's lbeta(). It splits off the
+        Stirling series of the gamma functions of large arguments, so that it
+        stays accurate when a and b are of very different size.
+    """
+    from scipy.special import gamma, gammaln
+    p = np.minimum(a, b)
+    q = np.maximum(a, b)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        pq = p + q
+        # lgamma(p) = -log(p) to within rounding, for tiny (subnormal) p
+        lgamma_p = np.where(p < 1e-306, -np.log(p), gammaln(p))
+        # both large
+        big = (-0.5 * np.log(q) + _LN_SQRT_2PI
+               + _lgammacor(p) + _lgammacor(q) - _lgammacor(pq)
+               + (p - 0.5) * np.log(p / pq) + q * np.log1p(-p / pq))
+        # only q large
+        mixed = (lgamma_p + _lgammacor(q) - _lgammacor(pq)
+                 + p - p * np.log(pq) + (q - 0.5) * np.log1p(-p / pq))
+        # both small
+        small = np.where(p < 1e-306,
+                         lgamma_p + (gammaln(q) - gammaln(pq)),
+                         np.log(gamma(p) * (gamma(q) / gamma(pq))))
+        out = np.where(p >= 10, big, np.where(q >= 10, mixed, small))
+    out = np.where(np.isinf(q), -np.inf, out)
+    out = np.where(p == 0, np.inf, out)
+    return np.where((p < 0) | np.isnan(p) | np.isnan(q), np.nan, out)
+
+
+_LN_SQRT_2PI = 0.5 * math.log(2 * math.pi)
+
+# Coefficients of the Stirling series, B_2n / (2n (2n - 1))
+_STIRLING = [1 / 12, -1 / 360, 1 / 1260, -1 / 1680, 1 / 1188, -691 / 360360,
+             1 / 156, -3617 / 122400, 43867 / 244188]
+
+
+def _lgammacor(x):
+    """ lgamma(x) - ((x - 0.5) log(x) - x + log(sqrt(2 pi))), for x >= 10 """
+    x = np.maximum(x, 10.0)
+    x2 = 1 / (x * x)
+    total = 0.0
+    for coef in reversed(_STIRLING):
+        total = total * x2 + coef
+    return total / x
+
+
+_SCALAR_TYPES = (int, float, np.int64, np.float64)
+
+# All the factorials that fit in a float64, correctly rounded
+_FACTORIALS = np.array([float(math.factorial(i)) for i in range(171)])
+
+
+def _round_if_int(x, n):
+    """ Rounds the results x to whole numbers, where n is an integer """
+    return np.where(n == np.round(n), np.round(x), x)[()]
+
+
+def _choose(n, k, exact=False):
+    """ n choose k (see choose()), without the instrumentation, so that it
+        can be called from the other public functions.
+    """
+    if exact:
+        return _exact(_comb, n, k)
+    from scipy.special import binom
+    if n.__class__ in _SCALAR_TYPES and k.__class__ in _SCALAR_TYPES \
+            and math.isfinite(n) and math.isfinite(k):
+        k = round(k)
+        if k < 0:
+            return np.float64(0)
+        if n < 0 and n == round(n):
+            return (-1)**k * _choose(k - n - 1, k)
+        out = binom(n, k)
+        return np.round(out) if n == round(n) else out
+
+    n = np.asarray(n, dtype=float)
+    k = np.round(np.asarray(k, dtype=float))
+    # Negative integers n, which scipy does not support
+    negint = (n < 0) & (n == np.round(n))
+    sign = np.where(negint & (k % 2 == 1), -1.0, 1.0)
+    n = np.where(negint, k - n - 1, n)
+    out = np.where(k < 0, 0.0, sign * binom(n, k))
+    return _round_if_int(out, n)
+
+
+def _comb(n, k):
+    """ Exact n choose k, with the same conventions as R's choose() """
+    if k < 0:
+        return 0
+    if n < 0:
+        return (-1)**k * math.comb(k - n - 1, k)
+    return math.comb(n, k)
+
+
+def _perm(n, k):
+    """ Exact n! / (n - k)! """
+    if k < 0 or k > n >= 0:
+        return 0
+    if n < 0:
+        # Falling factorial of a negative number
+        return (-1)**k * math.perm(k - n - 1, k) if k else 1
+    return math.perm(n, k)
+
+
+def _exact(func, *args):
+    """ Applies func to integer arguments, which are either all scalars, or
+        arrays that get broadcast, in which case it returns an object array
+        of python ints.
+    """
+    args = [np.asarray(a) for a in args]
+    for a in args:
+        if a.dtype.kind == "f" and not np.all(a == np.round(a)):
+            raise ValueError("exact=True requires integer arguments")
+    if all(a.ndim == 0 for a in args):
+        return func(*[int(a) for a in args])
+    ints = [a.astype(np.int64).astype(object) for a in args]
+    return np.frompyfunc(func, len(args), 1)(*ints)
 
 
 # TODO: make sqrt() automatically load up by implementing a call to math.sqrt()
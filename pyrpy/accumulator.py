@@ -0,0 +1,130 @@
+import numpy as np
+
+__author__ = 'Ronny Restrepo'
+__all__ = ["Accumulator"]
+
+
+# ==============================================================================
+#                                                                    ACCUMULATOR
+# ==============================================================================
+class Accumulator(object):
+    """
+    Streaming, mergeable accumulator for the mean and standard deviation.
+
+    Values can be fed in one chunk at a time using `update()`, and only the
+    count, the running mean, and the running sum of squared deviations from
+    the mean are kept in memory. Each chunk is summarised on its own, and then
+    combined with the running totals using the parallel (pairwise) form of
+    Welford's algorithm, which is numerically stable.
+
+    Accumulators that were fed different partitions of the data (eg in
+    different worker processes) can be combined with `merge()` (or `+`) to
+    give the same result as if all the data had been fed into a single one.
+
+    Parameters
+    ----------------------------------------------------------------------------
+    axis: None or int, optional
+        If None (default), each chunk is flattened, and a single mean and sd
+        is accumulated. If an int, then a separate mean and sd is accumulated
+        for each position along the other axes, and chunks are stacked along
+        `axis` (eg axis=0 to stream the rows of a matrix in, and get the
+        column means).
+    na_rm: bool, optional
+        A boolean value indicating whether missing values should be
+        stripped from each chunk before it is accumulated.
+        Default is False
+
+    Attributes
+    ----------------------------------------------------------------------------
+    n : int or array of ints
+        Number of values accumulated so far.
+
+    Examples
+    ----------------------------------------------------------------------------
+    >>> from pyrpy.accumulator import Accumulator
+    >>> acc = Accumulator()
+    >>> acc.update([12, 11, 16, 14]).update([13, 10, 14, 15, 12]).sd()
+    1.9364916731037085
+
+    See Also
+    ----------------------------------------------------------------------------
+    mean: Mean
+    sd: Standard deviation
+    """
+    def __init__(self, axis=None, na_rm=False):
+        self.axis = axis
+        self.na_rm = na_rm
+        self.n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, x):
+        """ Accumulates a chunk of values, and returns self """
+        x = np.asarray(x, dtype=float)
+        axis = self.axis
+        if axis is None:
+            x = x.ravel()
+            axis = 0
+
+        if self.na_rm:
+            nans = np.isnan(x)
+            n = x.shape[axis] - nans.sum(axis=axis)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.nansum(x, axis=axis) / n
+                m2 = np.nansum((x - np.expand_dims(mean, axis)) ** 2, axis=axis)
+        else:
+            n = x.shape[axis]
+            if n == 0:
+                return self
+            mean = x.mean(axis=axis)
+            m2 = ((x - np.expand_dims(mean, axis)) ** 2).sum(axis=axis)
+        self._combine(n, mean, m2)
+        return self
+
+    def merge(self, other):
+        """ Merges the values accumulated by another accumulator into this
+            one, and returns self
+        """
+        self._combine(other.n, other._mean, other._m2)
+        return self
+
+    def __add__(self, other):
+        out = Accumulator(axis=self.axis, na_rm=self.na_rm)
+        return out.merge(self).merge(other)
+
+    def mean(self):
+        """ The mean of the values accumulated so far (nan if there are
+            no values)
+        """
+        with np.errstate(invalid="ignore"):
+            return np.where(self.n > 0, self._mean, np.nan)[()]
+
+    def var(self):
+        """ The unbiased sample variance (dividing by n - 1) of the values
+            accumulated so far (nan if there are fewer than 2 values)
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.n > 1, self._m2 / (self.n - 1), np.nan)[()]
+
+    def sd(self):
+        """ The unbiased sample standard deviation (dividing by n - 1) of the
+            values accumulated so far (nan if there are fewer than 2 values)
+        """
+        return np.sqrt(self.var())
+
+    def _combine(self, n, mean, m2):
+        """ Combines the running totals with those of another set of values,
+            with `n` values, the given mean, and sum of squared deviations m2.
+        """
+        n_total = self.n + n
+        delta = mean - self._mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frac = np.where(n_total > 0, n / n_total, 0.0)
+            # Positions where nothing has been accumulated on one side, take
+            # the values from the other side (avoids nan from 0 * nan).
+            mean = np.where(n == 0, self._mean, self._mean + delta * frac)
+            m2 = np.where(n == 0, self._m2,
+                          self._m2 + m2 + delta * delta * self.n * frac)
+        self.n = n_total
+        self._mean = mean[()]
+        self._m2 = m2[()]
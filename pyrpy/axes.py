@@ -0,0 +1,36 @@
+"""====================================================
+                    AXES
+
+Helpers shared by the plotting functions, so that they can either draw on the
+current pyplot axes (the default, for interactive use), or on an explicit
+matplotlib Axes object without touching the global pyplot state (eg when
+rendering figures to files, see pyrpy.render).
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+__author__ = 'Ronny Restrepo'
+
+
+def get_axes(ax=None):
+    """ Returns ax, or the current pyplot axes if ax is None """
+    if ax is None:
+        from matplotlib import pyplot as plt
+        ax = plt.gca()
+    return ax
+
+
+def add_grid(ax):
+    """ Adds the major and minor grid lines used by all of the plots """
+    ax.minorticks_on()
+    ax.grid(True, which='major', color='#666666', linestyle='-')
+    ax.grid(True, which='minor', color='#999999', linestyle='-', alpha=0.2)
+
+
+def show(ax, primary):
+    """ Renders the plot, if it is the primary plot and ax was not given
+        explicitly (ie it is the current pyplot axes).
+    """
+    if primary and ax is None:
+        from matplotlib import pyplot as plt
+        plt.show()
@@ -5,8 +5,145 @@
 """
 __author__ = 'Ronny Restrepo'
 
+import numpy as np
 from scipy.stats import binom
+from pyrpy.tails import tail_probs, is_batched, stack_regions
+from pyrpy.table_cache import TableCache
+from pyrpy.rng import get_rng
+from pyrpy.instrument import instrument
 
+# Fuzz used when searching the cumulative tables for quantiles (same as R)
+_QFUZZ = 64 * np.finfo(float).eps
+
+# Plain scalars take a fast path through the table lookups, since the cost of
+# the numpy array operations dominates for single values.
+_SCALAR_TYPES = (float, int, np.float64, np.int64)
+
+
+# ==============================================================================
+#                                                                    TABLE CACHE
+# ==============================================================================
+def _build_tables(key):
+    """ Builds the pmf, cdf and survival function tables over all the
+        possible outcomes 0..size, for a (size, prob) pair.
+    """
+    size, prob = key
+    k = np.arange(size + 1)
+    return (binom.pmf(k, n=size, p=prob),
+            binom.cdf(k, n=size, p=prob),
+            binom.sf(k, n=size, p=prob))
+
+
+_cache = TableCache(_build_tables)
+
+
+def binom_cache(maxbytes=64 * 2**20):
+    """
+    Enables (or disables) the cache of binomial probability tables.
+
+    When the cache is enabled, the first call to dbinom, pbinom, qbinom or
+    cbinom for a given (scalar) size and prob builds the pmf and cumulative
+    tables for all the outcomes 0..size. Subsequent calls with the same
+    parameters are then answered by indexing into (or searching) those
+    tables, which is much faster than going through scipy.stats each time.
+
+    :param maxbytes: int. Memory budget in bytes for all the cached tables.
+                     Each (size, prob) pair takes up 24 * (size + 1) bytes.
+                     When the budget is exceeded, the least recently used
+                     tables get evicted.
+                     Use 0 to disable (and clear) the cache.
+                     DEFAULT = 64MB
+    :return: None
+
+    EXAMPLES:
+    binom_cache()                   # enable with 64MB budget
+    binom_cache(maxbytes=2**30)     # enable with 1GB budget
+    binom_cache(0)                  # disable
+    """
+    _cache.configure(maxbytes)
+
+
+def binom_cache_info():
+    """
+    Statistics of the cache of binomial probability tables.
+
+    :return: dict with the number of "hits", "misses" and "evictions", as well
+             as the number of "entries", and memory used ("nbytes") out of the
+             memory budget ("maxbytes").
+    """
+    return _cache.info()
+
+
+def _table_key(size, prob):
+    """ Returns the (size, prob) key of the tables for the parameters, or None
+        if they are not valid scalars.
+    """
+    if (size.__class__ not in _SCALAR_TYPES
+            or prob.__class__ not in _SCALAR_TYPES):
+        return None
+    if not (0 <= prob <= 1) or not (0 <= size < np.inf) or size != int(size):
+        return None
+    return (int(size), float(prob))
+
+
+def _cached_tables(size, prob):
+    """ Returns the cached (pmf, cdf, sf) tables for the parameters, or None
+        if the cache is disabled, or can not be used for these parameters.
+    """
+    if not _cache.enabled:
+        return None
+    key = _table_key(size, prob)
+    if key is None:
+        return None
+    return _cache.get(key)
+
+
+def _lookup(x, table, below, above, size):
+    """ Looks up the value of table at the integers x, using `below` for
+        values of x less than 0, and `above` for values greater than size.
+        nan values of x give nan.
+    """
+    if x.__class__ in _SCALAR_TYPES:
+        if x < 0:
+            return np.float64(below)
+        elif x > size:
+            return np.float64(above)
+        elif x >= 0:
+            return table[int(x)]
+        return np.float64(np.nan)
+
+    x = np.asarray(x, dtype=float)
+    inside = (x >= 0) & (x <= size)
+    out = table[np.where(inside, x, 0).astype(np.intp)]
+    out = np.where(inside, out, np.where(x < 0, below, above))
+    return np.where(np.isnan(x), np.nan, out)[()]
+
+
+def _pmf_lookup(x, pmf, size):
+    """ Looks up the pmf table at x, which is 0 for non-integer values """
+    if x.__class__ in _SCALAR_TYPES:
+        if x == np.floor(x) or x != x:
+            return _lookup(x, pmf, 0.0, 0.0, size)
+        return np.float64(0.0)
+    x = np.asarray(x, dtype=float)
+    out = _lookup(x, pmf, 0.0, 0.0, size)
+    return np.where((x == np.floor(x)) | np.isnan(x), out, 0.0)[()]
+
+
+def _log_lookup(out, x, logfunc):
+    """ Takes the log of the table values in out, falling back to scipy in
+        the places where the table entries underflowed (to 0, or to a
+        subnormal number, which has lost most of its precision).
+    """
+    with np.errstate(divide="ignore"):
+        logout = np.log(out)
+    redo = out < np.finfo(float).tiny
+    if np.any(redo):
+        logout = np.where(redo, logfunc(x), logout)
+    return logout[()]
+
+
+@instrument
 def cbinom(size=1, prob=0.5, type="equal", conf=0.95):
     """
     ============================================================================
@@ -14,6 +151,10 @@ def cbinom(size=1, prob=0.5, type="equal", conf=0.95):
     ============================================================================
     Confidence region for a binomial Distribution.
 
+    Any of the arguments can also be given as arrays, to calculate many
+    confidence regions in one vectorized pass. The arrays are broadcast against
+    each other.
+
     Args:
     :param size (int): number of trials for the binomial distribution.
     :param p (float): probability of success per trial
@@ -25,35 +166,33 @@ def cbinom(size=1, prob=0.5, type="equal", conf=0.95):
     :param conf (float): confidence interval used
     :return: a list with two values representing the lower and upper points that
              fit within your confidence interval.
+             If any of the arguments is an array, then it returns a (k, 2)
+             array instead, with one [lower, upper] row per region.
+    :raises ValueError: if type is not one of the values listed above.
 
     Examples:
     cbinom(size=100, p=0.7, type="equal", conf=0.99)
     cbinom(size=15, p=0.9, type="less", conf=0.95)
     cbinom(size=30, p=0.4, type="more", conf=0.90)
+    cbinom(size=[10, 20, 30], p=0.4, type="equal", conf=0.90)
     ============================================================================
     """
-    # TODO: add  option to use "greater", "higher", ">" , "<", "=" as values to
+    # TODO: add  option to use "higher", ">" , "<", "=" as values to
     #       the type argument.
     # Account for the different types of cutoff quantiles
-    alpha = 1 - conf
-    if (type == "less"):
-        p_lower = alpha
-        p_upper = 1.0
-    elif (type == "more") or (type == "greater"):
-        p_lower = 0.0
-        p_upper = conf
-    elif (type == "equal"):
-        p_lower= alpha/2
-        p_upper = 1 - (alpha/2)
+    p_lower, p_upper = tail_probs(type, conf)
 
     # calculate the cutoff points
     cutoff_lower = qbinom(p_lower, size=size, prob=prob, lowertail=True)
     cutoff_upper = qbinom(p_upper, size=size, prob=prob, lowertail=True)
 
+    if is_batched(size, prob, type, conf):
+        return stack_regions(cutoff_lower, cutoff_upper)
     return([cutoff_lower, cutoff_upper])
 
 
-def rbinom(n=1, size=1, prob=0.5):
+@instrument
+def rbinom(n=1, size=1, prob=0.5, rng=None):
     """
     ============================================================================
                                                                         rbinom()
@@ -68,25 +207,30 @@ def rbinom(n=1, size=1, prob=0.5):
     dbinom(x, size, prob=0.5, log=False)
     pbinom(q, size, prob=0.5, lowertail=True, log=False)
     qbinom(p, size, prob=0.5, lowertail=True, log=False)
-    rbinom(n=1, size=1, prob=0.5)
+    rbinom(n=1, size=1, prob=0.5, rng=None)
 
     :param n:     int. size of the array
     :param size:  int. Number of trials
     :param prob:  float. probability of success for each trial
+    :param rng:   None, int or numpy.random.Generator. The random number
+                  generator to draw from. If None, then uses the global
+                  generator (see set_seed()). If an int, then it is used as
+                  the seed of a new generator.
     :return:      returns an array of random numbers
 
     EXAMPLES:
     rbinom()                # returns eg a flip of a fair coin
     rbinom(10)              # returns eg 10 flips of a fair coin
     rbinom(10, prob=0.7)    # returns eg 10 flips of an unfair coin P(Head)= 0.7
-
+    rbinom(10, rng=42)      # returns the same 10 flips every time
 
     ============================================================================
     """
-    # Note, scipy flips meaning of n and size
-    return binom.rvs(n=size, p=prob, size=n)
+    # Note, numpy flips meaning of n and size
+    return get_rng(rng).binomial(n=size, p=prob, size=n)
 
 
+@instrument
 def dbinom(x, size=1, prob=0.5, log=False):
     """
     ============================================================================
@@ -100,7 +244,7 @@ def dbinom(x, size=1, prob=0.5, log=False):
     dbinom(x, size, prob=0.5, log=False)
     pbinom(q, size, prob=0.5, lowertail=True, log=False)
     qbinom(p, size, prob=0.5, lowertail=True, log=False)
-    rbinom(n=1, size=1, prob=0.5)
+    rbinom(n=1, size=1, prob=0.5, rng=None)
 
     :param x:       int. or array of ints. The number of successes
     :param size:    int. Number of trials
@@ -109,6 +253,14 @@ def dbinom(x, size=1, prob=0.5, log=False):
     :return:
     ============================================================================
     """
+    tables = _cached_tables(size, prob)
+    if tables is not None:
+        pmf = _pmf_lookup(x, tables[0], size)
+        if log:
+            return _log_lookup(pmf, x,
+                               lambda x: binom.logpmf(x, n=size, p=prob))
+        return pmf
+
     if log:
         # note, scipy flips meaning of n and size
         return binom.logpmf(x, n=size, p=prob, loc=0)
@@ -117,6 +269,7 @@ def dbinom(x, size=1, prob=0.5, log=False):
         return binom.pmf(x, n=size, p=prob)
 
 
+@instrument
 def qbinom(q, size=1, prob=0.5, lowertail=True):
     """
     ============================================================================
@@ -130,24 +283,53 @@ def qbinom(q, size=1, prob=0.5, lowertail=True):
     dbinom(x, size, prob=0.5, log=False)
     pbinom(q, size, prob=0.5, lowertail=True, log=False)
     qbinom(p, size, prob=0.5, lowertail=True)
-    rbinom(n=1, size=1, prob=0.5)
+    rbinom(n=1, size=1, prob=0.5, rng=None)
+
+    When there are many quantiles to look up for a single (size, prob), the
+    cumulative probabilities of all the outcomes 0..size are computed once,
+    and all the quantiles are found with a single binary search over them
+    (this is also done when the binom_cache() is enabled).
 
     :param q:       float. or array of floats. The quantile ()
     :param size:    int. Number of trials
     :param prob:    float. Probability of a success
-    :param log:     bool. take the log?
-    :return:        an array of the value(s) corresponding to the quantiles q
+    :param lowertail bool. lowertail (true), or survival (false)
+    :return:        an array of the value(s) corresponding to the quantiles q.
+                    These are integers, unless any of the values is nan (eg
+                    for quantiles outside of [0, 1]), in which case they are
+                    floats.
     ============================================================================
     """
-    # TODO: BUG: qbinom(0, size=11, prob=0.3) gives -1. It should be 0
-    # TODO: check that q is between 0.0 and 1.0
+    tables = _cached_tables(size, prob)
+    if tables is not None:
+        table = tables[1] if lowertail else tables[2]
+        return _qbinom_search(q, size, table, lowertail=lowertail)
+
+    # Build the cumulative table, if it costs less than searching for each q
+    key = _table_key(size, prob)
+    if key is not None and 4 * np.size(q) > key[0]:
+        k = np.arange(key[0] + 1)
+        if lowertail:
+            table = binom.cdf(k, n=size, p=prob)
+        else:
+            table = binom.sf(k, n=size, p=prob)
+        return _qbinom_search(q, key[0], table, lowertail=lowertail)
 
     if lowertail:
-        return binom.ppf(q=q, n=size, p=prob)
+        x = binom.ppf(q=q, n=size, p=prob)
     else:
-        return binom.isf(q=q, n=size, p=prob)
+        x = binom.isf(q=q, n=size, p=prob)
+    # scipy returns -1 instead of 0 at the boundary (q=0, or q=1 for the
+    # upper tail), and size instead of 0 when prob=0, whereas R returns 0.
+    if q.__class__ in _SCALAR_TYPES and prob.__class__ in _SCALAR_TYPES:
+        x = 0.0 if prob == 0 and 0 < q < 1 else max(x, 0.0)
+        return np.int64(x) if np.isfinite(x) else np.float64(x)
+    q = np.asarray(q)
+    x = np.where((np.asarray(prob) == 0) & (q > 0) & (q < 1), 0, x)
+    return _as_integer(np.maximum(x, 0)[()])
 
 
+@instrument
 def pbinom(x, size=1, prob=0.5, lowertail=True, log=False):
     """
     ============================================================================
@@ -164,7 +346,7 @@ def pbinom(x, size=1, prob=0.5, lowertail=True, log=False):
     dbinom(x, size, prob=0.5, log=False)
     pbinom(x, size, prob=0.5, lowertail=True, log=False)
     qbinom(q, size, prob=0.5, lowertail=True)
-    rbinom(n=1, size=1, prob=0.5)
+    rbinom(n=1, size=1, prob=0.5, rng=None)
 
     :param x:       int. or array of ints. The values along the distribution.
     :param size:    int. Number of trials
@@ -175,6 +357,19 @@ def pbinom(x, size=1, prob=0.5, lowertail=True, log=False):
     :return:        an array of quantiles() corresponding to the values in x
     ============================================================================
     """
+    tables = _cached_tables(size, prob)
+    if tables is not None:
+        k = np.floor(x) if x.__class__ in _SCALAR_TYPES else \
+            np.floor(np.asarray(x, dtype=float))
+        if lowertail:
+            out = _lookup(k, tables[1], 0.0, 1.0, size)
+        else:
+            out = _lookup(k, tables[2], 1.0, 0.0, size)
+        if log:
+            logfunc = binom.logcdf if lowertail else binom.logsf
+            return _log_lookup(out, k, lambda k: logfunc(k, n=size, p=prob))
+        return out
+
     if lowertail and not log:
         return binom.cdf(x, n=size, p=prob)
     elif not lowertail and not log:
@@ -184,5 +379,50 @@ def pbinom(x, size=1, prob=0.5, lowertail=True, log=False):
     else:
         return binom.logsf(x, n=size, p=prob)
 
+
+def _qbinom_search(q, size, table, lowertail=True):
+    """ Quantile function of the binomial distribution, using a binary search
+        over the cumulative probabilities (the cdf if lowertail, otherwise the
+        survival function) of all the outcomes 0..size.
+        Follows the same conventions as R at the boundaries.
+    """
+    if q.__class__ in _SCALAR_TYPES:
+        if not 0 <= q <= 1:
+            return np.float64(np.nan)
+        elif lowertail:
+            x = 0 if q == 0 else size if q == 1 else \
+                np.searchsorted(table, q * (1 - _QFUZZ), side="left")
+        else:
+            x = size if q == 0 else 0 if q == 1 else size + 1 - \
+                np.searchsorted(table[::-1], q * (1 + _QFUZZ), side="right")
+        return np.int64(min(x, size))
+
+    q = np.asarray(q, dtype=float)
+    if lowertail:
+        # Smallest x such that P(X <= x) >= q
+        x = np.searchsorted(table, q * (1 - _QFUZZ), side="left")
+        x = np.where(q == 0, 0, np.where(q == 1, size, x))
+    else:
+        # Smallest x such that P(X > x) <= q. Reversing the survival function
+        # gives an increasing view of it that can be searched.
+        j = np.searchsorted(table[::-1], q * (1 + _QFUZZ), side="right") - 1
+        x = np.where(q == 0, size, np.where(q == 1, 0, size - j))
+    x = np.minimum(x, size)
+    valid = (q >= 0) & (q <= 1)
+    if not valid.all():
+        x = np.where(valid, x, np.nan)
+    # Integers, even when size is a float (eg 10.0), like the scalar path
+    return _as_integer(x[()])
+
+
+def _as_integer(x):
+    """ Converts the array of whole numbers x to integers, unless it has
+        any nan (or infinite) values.
+    """
+    if np.isfinite(x).all():
+        return x.astype(np.int64)[()]
+    return x
+
+
 if __name__ == '__main__':
     print("This is the distributions module")
\ No newline at end of file
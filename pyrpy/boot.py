@@ -0,0 +1,333 @@
+"""====================================================
+                    BOOT
+
+Bootstrap resampling and confidence intervals, like R's boot() and boot.ci()
+(from R's boot package).
+
+The replicates are computed in fixed size blocks. Each block draws a matrix of
+resample indices (one row per replicate) from its own random stream, derived
+from the seed and the position of the block, so the results are reproducible
+no matter how many processes the blocks are spread across. The built in
+statistics (mean and sd) are computed for a whole block at once, as
+reductions along the rows of the resampled matrix, and the size of the blocks
+keeps the memory bounded, rather than allocating all R x n indices at once.
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+import os
+import warnings
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from pyrpy.chunked import CHUNKSIZE
+from pyrpy.instrument import instrument
+from pyrpy.mean import mean
+from pyrpy.norm import pnorm, qnorm
+from pyrpy.sd import sd
+
+__author__ = 'Ronny Restrepo'
+
+Boot = namedtuple("Boot", ["t0", "t", "R", "data", "statistic", "kwargs"])
+
+CI_TYPES = ("norm", "basic", "perc", "bca")
+
+# The statistics that are computed for a whole block of replicates at once,
+# and the functions that are recognised as being one of them.
+STATISTICS = ("mean", "sd")
+_STATISTIC_FUNCS = {mean: "mean", np.mean: "mean", sd: "sd"}
+
+# Data, statistic and kwargs of the boot() call in a worker process (set once
+# per worker, rather than sent along with every block)
+_worker = {}
+
+
+# ==============================================================================
+#                                                                           BOOT
+# ==============================================================================
+@instrument
+def boot(data, statistic, R, seed=None, processes=None, blocksize=None,
+         **kwargs):
+    """
+    Generates R bootstrap replicates of a statistic, like R's boot() (for
+    ordinary, non parametric, resampling).
+
+    ARGS:
+    ---------------------
+    :param data (array like):
+        The data. If 2D, then the rows are resampled.
+    :param statistic (str or function):
+        "mean" or "sd" (or pyrpy.mean, pyrpy.sd or np.mean) are computed for
+        a whole block of replicates at once (the mean or sd of each column,
+        if data is 2D). Any other function is called once per replicate, with
+        the resampled data (and the extra keyword arguments), and should
+        return a scalar or a 1D array. To be used with processes other than
+        1, it must be importable from the worker processes (ie not a lambda).
+    :param R (int):
+        Number of bootstrap replicates.
+    :param seed (None, int or SeedSequence):
+        Root seed for the random streams of the blocks.
+    :param processes (None or int):
+        Number of worker processes. If None, then uses the number of cpus. If
+        1, then everything is computed in the current process.
+    :param blocksize (None or int):
+        Number of replicates per block. If None, then uses as many as fit in
+        around CHUNKSIZE resampled values.
+    :param **kwargs:
+        Other arguments to pass on to statistic.
+
+    RETURN:
+    ---------------------
+    :return: Boot namedtuple with the attributes:
+                - t0:        the statistic of the original data
+                - t:         array of the R replicates of the statistic (one
+                             row per replicate, if it is not a scalar)
+                - R:         the number of replicates
+                - data, statistic, kwargs: the arguments (used by boot_ci())
+
+    EXAMPLES:
+    ---------------------
+    b = boot(x, "mean", R=10000, seed=42)
+    boot_ci(b, type="bca")
+
+    b = boot(x, np.median, R=2000, seed=42)
+    """
+    # ==========================================================================
+    data = np.asarray(data)
+    if len(data) == 0:
+        raise ValueError("no data in bootstrap")
+    if blocksize is None:
+        blocksize = max(1, CHUNKSIZE // max(data.size, 1))
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    starts = range(0, R, blocksize)
+    tasks = [(min(blocksize, R - start), child)
+             for start, child in zip(starts, seed.spawn(len(starts)))]
+
+    how = _builtin(statistic, kwargs)
+    if how is not None:
+        t0 = _reduce(data[None], how)[0]
+    else:
+        t0 = np.asarray(statistic(data, **kwargs))[()]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes == 1 or len(tasks) <= 1:
+        blocks = [_replicates(data, statistic, kwargs, size, child)
+                  for size, child in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes,
+                                 initializer=_init_worker,
+                                 initargs=(data, statistic, kwargs)) as executor:
+            blocks = list(executor.map(_worker_replicates, tasks))
+    if blocks:
+        t = np.concatenate(blocks)
+    else:
+        t = np.empty((0,) + np.shape(t0))
+    return Boot(t0=t0, t=t, R=R, data=data, statistic=statistic,
+                kwargs=kwargs)
+
+
+def _builtin(statistic, kwargs):
+    """ Name of the built in statistic, or None if it is computed by calling
+        statistic
+    """
+    if isinstance(statistic, str):
+        if statistic not in STATISTICS:
+            raise ValueError("statistic must be a function, or one of {}"
+                             "".format(STATISTICS))
+        return statistic
+    if kwargs:
+        return None
+    return _STATISTIC_FUNCS.get(statistic)
+
+
+def _reduce(resampled, how):
+    """ The built in statistic of each of the resamples (along axis 0) """
+    if how == "mean":
+        return resampled.mean(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return resampled.std(axis=1, ddof=1)
+
+
+def _replicates(data, statistic, kwargs, size, seed):
+    """ Computes a block of `size` bootstrap replicates """
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, len(data), size=(size, len(data)))
+    how = _builtin(statistic, kwargs)
+    if how is not None:
+        return _reduce(data[indices], how)
+    return np.array([statistic(data[i], **kwargs) for i in indices])
+
+
+def _init_worker(data, statistic, kwargs):
+    _worker.update(data=data, statistic=statistic, kwargs=kwargs)
+
+
+def _worker_replicates(task):
+    """ Computes a block of replicates of boot() in a worker process """
+    size, seed = task
+    return _replicates(_worker["data"], _worker["statistic"],
+                       _worker["kwargs"], size, seed)
+
+
+# ==============================================================================
+#                                                                      JACKKNIFE
+# ==============================================================================
+@instrument
+def jackknife(data, statistic, **kwargs):
+    """
+    Leave one out (jackknife) values of a statistic, ie the statistic of the
+    data with each of its values (or rows) removed in turn.
+
+    :param data:        array like. If 2D, then the rows are removed.
+    :param statistic:   str or function (see boot()). The mean and sd are
+                        computed for all of the n subsets at once, from the
+                        sums of the data, rather than n separate times.
+    :param **kwargs:    other arguments to pass on to statistic
+    :return:            array with the statistic of each of the n subsets
+    """
+    data = np.asarray(data)
+    n = len(data)
+    how = _builtin(statistic, kwargs)
+    if how is None:
+        return np.array([statistic(np.delete(data, i, axis=0), **kwargs)
+                         for i in range(n)])
+
+    data = data.astype(float, copy=False)
+    dev = data - data.mean(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if how == "mean":
+            return (dev.sum(axis=0) - dev) / (n - 1) + data.mean(axis=0)
+        ss = np.square(dev).sum(axis=0)
+        return np.sqrt((ss - np.square(dev) * n / (n - 1)) / (n - 2))
+
+
+# ==============================================================================
+#                                                                        BOOT_CI
+# ==============================================================================
+@instrument
+def boot_ci(boot_out, conf=0.95, type="all", index=0):
+    """
+    Bootstrap confidence intervals, like R's boot.ci().
+
+    ARGS:
+    ---------------------
+    :param boot_out (Boot):
+        The output of boot().
+    :param conf (float or array of floats):
+        Confidence level(s) of the intervals.
+    :param type (str or list of str):
+        Types of interval. Any of:
+            "norm":  normal approximation, corrected for the bootstrap bias
+            "basic": basic bootstrap interval
+            "perc":  bootstrap percentile interval
+            "bca":   adjusted (bias corrected and accelerated) percentile
+                     interval. The acceleration is estimated from the
+                     jackknife values of the statistic.
+            "all":   all of the above
+    :param index (int):
+        If the statistic returns an array, the position of the value in it to
+        compute the intervals for.
+
+    RETURN:
+    ---------------------
+    :return: dict mapping each type to its [lower, upper] interval (or a
+             (k, 2) array of intervals, one row per confidence level, if conf
+             is an array).
+
+    RAISES:
+    ---------------------
+    ValueError if the type is unknown, or if the BCa adjustment can not be
+    estimated (eg because every replicate is on the same side of t0).
+    """
+    # ==========================================================================
+    types = CI_TYPES if type == "all" else np.atleast_1d(type).tolist()
+    unknown = [ci for ci in types if ci not in CI_TYPES]
+    if unknown:
+        raise ValueError("Unknown value(s) for type: {}. Must be one of {}"
+                         "".format(unknown, list(CI_TYPES) + ["all"]))
+
+    t0, t = boot_out.t0, boot_out.t
+    if t.ndim > 1:
+        t0, t = np.asarray(t0)[index], t[:, index]
+    conf = np.asarray(conf, dtype=float)
+    alpha = np.stack([(1 - conf) / 2, (1 + conf) / 2], axis=-1)
+
+    out = {}
+    for ci in types:
+        if ci == "norm":
+            bias = np.mean(t) - t0
+            merr = np.std(t, ddof=1) * qnorm((1 + conf) / 2)
+            limits = np.stack([t0 - bias - merr, t0 - bias + merr], axis=-1)
+        elif ci == "basic":
+            limits = 2 * t0 - norm_inter(t, alpha[..., ::-1])
+        elif ci == "perc":
+            limits = norm_inter(t, alpha)
+        else:
+            limits = _bca(boot_out, t0, t, alpha, index)
+        out[ci] = limits
+    return out
+
+
+def _bca(boot_out, t0, t, alpha, index):
+    """ Limits of the BCa intervals at the given alphas (following R's
+        bca.ci())
+    """
+    finite = t[np.isfinite(t)]
+    w = qnorm(np.count_nonzero(finite < t0) / len(finite))
+    if not np.isfinite(w):
+        raise ValueError("estimated adjustment 'w' is infinite")
+
+    jack = jackknife(boot_out.data, boot_out.statistic, **boot_out.kwargs)
+    if jack.ndim > 1:
+        jack = jack[:, index]
+    L = (len(jack) - 1) * (np.mean(jack) - jack)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        a = np.sum(L**3) / (6 * np.sum(L**2)**1.5)
+    if not np.isfinite(a):
+        raise ValueError("estimated adjustment 'a' is NA")
+
+    zalpha = qnorm(alpha)
+    adj_alpha = pnorm(w + (w + zalpha) / (1 - a * (w + zalpha)))
+    return norm_inter(t, adj_alpha)
+
+
+# ==============================================================================
+#                                                                     NORM_INTER
+# ==============================================================================
+def norm_inter(t, alpha):
+    """
+    Quantiles of the bootstrap replicates t, at the probabilities alpha,
+    interpolating between the order statistics on the normal quantile scale
+    (like norm.inter() of R's boot package).
+
+    :param t:       array of replicates (non finite values are ignored)
+    :param alpha:   float or array of probabilities
+    :return:        array of the quantiles, with the shape of alpha
+    """
+    t = np.sort(t[np.isfinite(t)])
+    R = len(t)
+    alpha = np.asarray(alpha, dtype=float)
+    rk = (R + 1) * alpha
+    if not np.all((rk > 1) & (rk < R)):
+        warnings.warn("extreme order statistics used as endpoints")
+    k = np.clip(np.trunc(rk).astype(np.intp), 0, R)
+
+    # 1 based order statistics k and k + 1 (clamped to the sample)
+    tk = t[np.clip(k, 1, R) - 1]
+    tk1 = t[np.clip(k + 1, 1, R) - 1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = qnorm(alpha)
+        zk = qnorm(k / (R + 1))
+        zk1 = qnorm((k + 1) / (R + 1))
+        out = tk + (z - zk) / (zk1 - zk) * (tk1 - tk)
+    out = np.where(k == rk, tk, out)
+    out = np.where(k == 0, t[0], out)
+    out = np.where(k == R, t[-1], out)
+    return out[()]
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,177 @@
+"""====================================================
+                    CHUNKED
+
+Out of core computation of summary statistics, for data that is too large to
+fit in memory (eg numpy.memmap arrays, or binary files on disk). The data is
+read in fixed size chunks, which are summarised in parallel threads, and
+combined using Accumulator.
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from pyrpy.accumulator import Accumulator
+
+__author__ = 'Ronny Restrepo'
+
+# Number of values per chunk (8MB of float64), small enough for a chunk and
+# its temporaries to stay in cache, but large enough to amortise the overhead.
+CHUNKSIZE = 2**20
+
+
+# ==============================================================================
+#                                                                 IS_OUT_OF_CORE
+# ==============================================================================
+def is_out_of_core(x):
+    """ Returns True if x should be processed out of core, ie it is a path to
+        a file, or a numpy.memmap array.
+    """
+    return isinstance(x, (str, os.PathLike, np.memmap))
+
+
+# ==============================================================================
+#                                                                    OPEN_MEMMAP
+# ==============================================================================
+def open_memmap(x, dtype="float64"):
+    """
+    Opens a file as a read only memory mapped array.
+
+    ARGS:
+    ---------------------
+    :param x (str, path or numpy.memmap):
+        Path to either a ".npy" file, or a raw binary file of values of type
+        `dtype` (eg as written by ndarray.tofile()). If x is a memmap array
+        already, then it is returned as is.
+    :param dtype (str or numpy dtype):
+        The type of the values in raw binary files.
+
+    RETURN:
+    ---------------------
+    :return: numpy.memmap
+    """
+    # ==========================================================================
+    if isinstance(x, np.memmap):
+        return x
+    if str(x).endswith(".npy"):
+        return np.load(x, mmap_mode="r")
+    return np.memmap(x, dtype=dtype, mode="r")
+
+
+# ==============================================================================
+#                                                                CHUNKED_MOMENTS
+# ==============================================================================
+def chunked_moments(x, na_rm=False, chunksize=None, threads=None,
+                    dtype="float64"):
+    """
+    Accumulates the mean and standard deviation of a large array (or file)
+    chunk by chunk, with bounded memory.
+
+    Each chunk is summarised in a pool of threads (numpy releases the GIL
+    during the reductions), and the partial results are merged in order,
+    so the result does not depend on the number of threads.
+
+    ARGS:
+    ---------------------
+    :param x (array, numpy.memmap, str or path):
+        The values, or a path to a file of values (see open_memmap()).
+        Multidimensional arrays are flattened.
+    :param na_rm (bool):
+        Should missing values be removed?
+    :param chunksize (int):
+        Number of values to read per chunk. Defaults to CHUNKSIZE.
+    :param threads (int):
+        Number of threads. Defaults to the number of cpus.
+    :param dtype (str or numpy dtype):
+        The type of the values in raw binary files.
+
+    RETURN:
+    ---------------------
+    :return: Accumulator
+    """
+    # ==========================================================================
+    if isinstance(x, (str, os.PathLike)):
+        x = open_memmap(x, dtype=dtype)
+    x = x.reshape(-1)
+    chunksize = chunksize or CHUNKSIZE
+    threads = threads or os.cpu_count() or 1
+
+    def summarise(start):
+        return Accumulator(na_rm=na_rm).update(x[start: start + chunksize])
+
+    total = Accumulator(na_rm=na_rm)
+    starts = range(0, x.size, chunksize)
+    if threads == 1 or len(starts) <= 1:
+        for partial in map(summarise, starts):
+            total.merge(partial)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for partial in executor.map(summarise, starts):
+                total.merge(partial)
+    return total
+
+
+# ==============================================================================
+#                                                                 BLOCKED_MOMENTS
+# ==============================================================================
+def blocked_moments(x, axis=None, na_rm=False, chunksize=None):
+    """
+    Accumulates the mean and standard deviation of an array along an axis, in
+    blocks of consecutive rows (slices along the first axis), so that the
+    temporary arrays never hold more than around `chunksize` values, rather
+    than copies of the whole array.
+
+    ARGS:
+    ---------------------
+    :param x (array or numpy.memmap):
+        The values.
+    :param axis (None or int):
+        Axis to reduce along. If None, then x is flattened.
+    :param na_rm (bool):
+        Should missing values be removed?
+    :param chunksize (int):
+        Approximate number of values per block. Defaults to CHUNKSIZE.
+
+    RETURN:
+    ---------------------
+    :return: Accumulator, with one mean and sd per position along the other
+             axes.
+    """
+    # ==========================================================================
+    x = np.asarray(x)
+    if axis is None or x.ndim <= 1:
+        x = x.reshape(-1)
+        axis = 0
+    axis = axis % x.ndim
+    chunksize = chunksize or CHUNKSIZE
+    nrows = x.shape[0]
+    if x.size == 0:
+        # No values at all, but still one (empty) result per position along
+        # the other axes, eg the rows of a matrix with no columns
+        total = Accumulator(axis=axis, na_rm=na_rm)
+        shape = x.shape[:axis] + x.shape[axis + 1:]
+        total.n = np.zeros(shape, dtype=np.intp)
+        total._mean = np.zeros(shape)
+        total._m2 = np.zeros(shape)
+        return total
+    step = max(1, chunksize // (x.size // nrows))
+    blocks = (x[start: start + step] for start in range(0, nrows, step))
+
+    if axis == 0:
+        # Reducing along the rows, so merge the partial results of the blocks
+        total = Accumulator(axis=0, na_rm=na_rm)
+        for block in blocks:
+            total.update(block)
+        return total
+
+    # Each block of rows gives the complete results for those rows
+    parts = [Accumulator(axis=axis, na_rm=na_rm).update(block)
+             for block in blocks]
+    total = Accumulator(axis=axis, na_rm=na_rm)
+    total.n = np.concatenate([np.broadcast_to(p.n, np.shape(p._mean))
+                              for p in parts])
+    total._mean = np.concatenate([p._mean for p in parts])
+    total._m2 = np.concatenate([p._m2 for p in parts])
+    return total
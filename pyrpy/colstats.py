@@ -0,0 +1,155 @@
+"""====================================================
+                    COLSTATS
+
+Row and column sums, means and standard deviations of matrices, like R's
+colSums(), colMeans(), rowSums(), rowMeans() (and the colSds() and rowSds()
+of R's matrixStats package).
+
+Each is computed in a single vectorized pass over the matrix, one block of
+rows at a time, so that the temporary arrays (eg when removing missing
+values) stay small, even for matrices that barely fit in memory (or memory
+mapped arrays that do not fit at all).
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+import numpy as np
+from pyrpy.chunked import CHUNKSIZE, blocked_moments
+from pyrpy.instrument import instrument
+
+__author__ = 'Ronny Restrepo'
+__all__ = ["colSums", "colMeans", "colSds", "rowSums", "rowMeans", "rowSds"]
+
+
+def _as_matrix(x, dims):
+    """ Reshapes x to a matrix, whose rows are the first `dims` dimensions of
+        x, and whose columns are the remaining ones (like R's dims argument).
+        Returns the matrix, and the shapes of the row and column results.
+    """
+    x = np.asarray(x)
+    if x.ndim < 2:
+        raise ValueError("'x' must be an array of at least two dimensions")
+    if not 1 <= dims < x.ndim:
+        raise ValueError("invalid 'dims'")
+    rows, cols = x.shape[:dims], x.shape[dims:]
+    return x.reshape(int(np.prod(rows)), int(np.prod(cols))), rows, cols
+
+
+def _blocked_sums(x, axis, na_rm, chunksize=None):
+    """ Sums of the matrix x along axis, one block of rows at a time """
+    step = max(1, (chunksize or CHUNKSIZE) // max(x.shape[1], 1))
+    sum_ = np.nansum if na_rm else np.sum
+    blocks = (x[start: start + step] for start in range(0, x.shape[0], step))
+    if axis == 0:
+        total = np.zeros(x.shape[1])
+        for block in blocks:
+            total += sum_(block, axis=0, dtype=float)
+        return total
+    return np.concatenate([sum_(block, axis=1, dtype=float)
+                           for block in blocks] or [np.zeros(0)])
+
+
+# ==============================================================================
+#                                                                        COLUMNS
+# ==============================================================================
+@instrument
+def colSums(x, na_rm=False, dims=1):
+    """
+    Sums of each column of a matrix (or array).
+
+    :param x:       matrix (2D array), or array of 2 or more dimensions
+    :param na_rm:   bool. Should missing values be removed?
+    :param dims:    int. The first `dims` dimensions are regarded as the rows,
+                    and summed over.
+    :return:        array of the sums, with the shape of the remaining
+                    dimensions.
+    """
+    m, rows, cols = _as_matrix(x, dims)
+    return _blocked_sums(m, axis=0, na_rm=na_rm).reshape(cols)
+
+
+@instrument
+def colMeans(x, na_rm=False, dims=1):
+    """
+    Means of each column of a matrix (or array).
+
+    :param x:       matrix (2D array), or array of 2 or more dimensions
+    :param na_rm:   bool. Should missing values be removed?
+    :param dims:    int. The first `dims` dimensions are regarded as the rows,
+                    and averaged over.
+    :return:        array of the means, with the shape of the remaining
+                    dimensions.
+    """
+    m, rows, cols = _as_matrix(x, dims)
+    return np.reshape(blocked_moments(m, axis=0, na_rm=na_rm).mean(), cols)
+
+
+@instrument
+def colSds(x, na_rm=False, dims=1):
+    """
+    Standard deviations (dividing by n - 1) of each column of a matrix (or
+    array).
+
+    :param x:       matrix (2D array), or array of 2 or more dimensions
+    :param na_rm:   bool. Should missing values be removed?
+    :param dims:    int. The first `dims` dimensions are regarded as the rows.
+    :return:        array of the standard deviations, with the shape of the
+                    remaining dimensions.
+    """
+    m, rows, cols = _as_matrix(x, dims)
+    return np.reshape(blocked_moments(m, axis=0, na_rm=na_rm).sd(), cols)
+
+
+# ==============================================================================
+#                                                                           ROWS
+# ==============================================================================
+@instrument
+def rowSums(x, na_rm=False, dims=1):
+    """
+    Sums of each row of a matrix (or array).
+
+    :param x:       matrix (2D array), or array of 2 or more dimensions
+    :param na_rm:   bool. Should missing values be removed?
+    :param dims:    int. The first `dims` dimensions are regarded as the rows.
+                    The remaining ones are summed over.
+    :return:        array of the sums, with the shape of the first `dims`
+                    dimensions.
+    """
+    m, rows, cols = _as_matrix(x, dims)
+    return _blocked_sums(m, axis=1, na_rm=na_rm).reshape(rows)
+
+
+@instrument
+def rowMeans(x, na_rm=False, dims=1):
+    """
+    Means of each row of a matrix (or array).
+
+    :param x:       matrix (2D array), or array of 2 or more dimensions
+    :param na_rm:   bool. Should missing values be removed?
+    :param dims:    int. The first `dims` dimensions are regarded as the rows.
+                    The remaining ones are averaged over.
+    :return:        array of the means, with the shape of the first `dims`
+                    dimensions.
+    """
+    m, rows, cols = _as_matrix(x, dims)
+    return np.reshape(blocked_moments(m, axis=1, na_rm=na_rm).mean(), rows)
+
+
+@instrument
+def rowSds(x, na_rm=False, dims=1):
+    """
+    Standard deviations (dividing by n - 1) of each row of a matrix (or
+    array).
+
+    :param x:       matrix (2D array), or array of 2 or more dimensions
+    :param na_rm:   bool. Should missing values be removed?
+    :param dims:    int. The first `dims` dimensions are regarded as the rows.
+    :return:        array of the standard deviations, with the shape of the
+                    first `dims` dimensions.
+    """
+    m, rows, cols = _as_matrix(x, dims)
+    return np.reshape(blocked_moments(m, axis=1, na_rm=na_rm).sd(), rows)
+
+
+if __name__ == '__main__':
+    pass
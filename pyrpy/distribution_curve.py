@@ -0,0 +1,182 @@
+"""====================================================
+                    DISTRIBUTION CURVE
+
+Computes the points of the curve of a distribution (and the confidence
+interval to shade under it), as drawn by plot_distribution(), without doing
+any plotting. So it never imports matplotlib, and can be used to generate the
+curve data on a server with no display.
+
+The curves of the continuous distributions are computed once on a grid for
+the standardized distribution (mean 0, sd 1, or rate 1), which is cached, and
+then shifted and scaled to the requested parameters.
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+from pyrpy.instrument import instrument
+
+__author__ = 'Ronny Restrepo'
+
+Curve = namedtuple("Curve", ["x", "y", "ci"])
+
+DISTRIBUTIONS = ("normal", "t", "exp", "f", "binomial", "poisson")
+
+
+# ==============================================================================
+#                                                             DISTRIBUTION CURVE
+# ==============================================================================
+@instrument
+def distribution_curve(dist="normal", mean=None, sd=None, n=None, p=None,
+                       df=None, df2=None, rate=None, conf=0.95, res=200,
+                       plower=0.0001, pupper=0.9999):
+    """
+    ===========================================================================
+                                                            DISTRIBUTION CURVE
+    ===========================================================================
+    Computes the x and y values of the curve that plot_distribution() draws
+    for a distribution, along with the confidence interval it shades, but
+    without plotting anything.
+
+    ARGS:
+      dist    : "normal" "poisson" "binomial" "t" "f" "exp" determines the
+                distribution to use.
+      mean    : numeric. The mean of the distribution. If using poisson, this
+                is the lambda value. If using exp (and rate is not given),
+                then rate = 1/mean.
+                DEFAULT = 0 if using normal or t distribution.
+                DEFAULT = 1 if using poisson distribution.
+      sd      : Standard deviation (scale of the t distribution). If using
+                exp (and neither rate nor mean are given), then rate = 1/sd
+                DEFAULT = 1
+      n       : int. Number of trials of the binomial distribution.
+                DEFAULT: 1
+      p       : numeric. probability of success of the binomial distribution
+                DEFAULT: 0.5
+      df      : Degrees of Freedom when using t distribution.
+                Or the first degrees of freedom when using f distribution
+                DEFAULT = 10
+      df2     : Second degrees of freedom when using f distribution
+                DEFAULT = 100
+      rate    : Used for exponential Distribution
+                DEFAULT = 1
+      conf    : float. confidence level of the (equal tailed) interval to
+                shade. If None, then the interval spans the whole curve.
+                DEFAULT = 0.95
+      res     : integer. Number of points along the x axis, for the
+                continuous distributions.
+                DEFAULT = 200
+      plower  : numeric. The quantile of the distribution at the lower end of
+                the x axis.
+                DEFAULT = 0.0001
+      pupper  : numeric. The quantile at the upper end of the x axis.
+                DEFAULT = 0.9999
+
+    The location and scale parameters (mean and sd, or rate for exp) can also
+    be arrays, to compute the curves for many parameter sets in one
+    vectorized pass. Then x and y have one row per parameter set, and ci has
+    one [lower, upper] row per parameter set.
+
+    RETURN:
+      A Curve, which is a named tuple (x, y, ci) of the x values, the density
+      (or probability) at those x values, and the [lower, upper] bounds of the
+      confidence interval.
+
+    RAISES:
+      ValueError if dist is not one of the values listed above.
+    """
+    if dist in ("normal", "t"):
+        mean = 0 if mean is None else mean
+        sd = 1 if sd is None else sd
+        df = 10 if df is None else df
+        key = (dist, df if dist == "t" else None, None, res, plower, pupper,
+               conf)
+        return _affine(_standard_curve(*key), loc=mean, scale=sd)
+
+    elif dist == "exp":
+        if rate is None:
+            rate = 1 / np.asarray(mean if mean is not None else
+                                  sd if sd is not None else 1.0)
+        key = (dist, None, None, res, plower, pupper, conf)
+        return _affine(_standard_curve(*key), loc=0,
+                       scale=1 / np.asarray(rate))
+
+    elif dist == "f":
+        df = 10 if df is None else df
+        df2 = 100 if df2 is None else df2
+        curve = _standard_curve(dist, df, df2, res, plower, pupper, conf)
+        return Curve(*(a.copy() for a in curve))
+
+    elif dist == "binomial":
+        from pyrpy.binom import dbinom, cbinom
+        n = 1 if n is None else n
+        p = 0.5 if p is None else p
+        x = np.arange(n + 1)
+        ci = cbinom(size=n, prob=p, conf=conf) if conf is not None else None
+        return _discrete_curve(x, dbinom(x, n, prob=p), ci)
+
+    elif dist == "poisson":
+        from pyrpy.pois import dpois, qpois, cpois
+        mean = 1 if mean is None else mean
+        x = np.arange(qpois(plower, mean), qpois(pupper, mean) + 1)
+        ci = cpois(lambda_=mean, conf=conf) if conf is not None else None
+        return _discrete_curve(x, dpois(x, mean), ci)
+
+    raise ValueError("Unknown value for dist: {}. Must be one of {}".format(
+        dist, DISTRIBUTIONS))
+
+
+def _discrete_curve(x, y, ci):
+    if ci is None:
+        ci = [x[0], x[-1]]
+    return Curve(x=x, y=y, ci=np.asarray(ci))
+
+
+def _affine(curve, loc, scale):
+    """ Shifts and scales a standardized curve. If loc or scale are arrays,
+        then it returns one curve (row) per element.
+    """
+    loc = np.asarray(loc, dtype=float)[..., None]
+    scale = np.asarray(scale, dtype=float)[..., None]
+    return Curve(x=curve.x * scale + loc,
+                 y=curve.y / scale,
+                 ci=curve.ci * scale + loc)
+
+
+@lru_cache(maxsize=256)
+def _standard_curve(dist, df, df2, res, plower, pupper, conf):
+    """ The curve of the standardized continuous distribution (cached). The
+        arrays are read only, since they are shared by every call.
+    """
+    if dist == "normal":
+        from pyrpy.norm import qnorm, dnorm
+        q, d = qnorm, dnorm
+    elif dist == "t":
+        from pyrpy.t import qt, dt
+        q = lambda p: qt(p, df=df)
+        d = lambda x: dt(x, df=df)
+    elif dist == "exp":
+        q = lambda p: -np.log1p(-np.asarray(p))
+        d = lambda x: np.exp(-x)
+    else:
+        from scipy.stats import f
+        q = lambda p: f.ppf(p, df, df2)
+        d = lambda x: f.pdf(x, df, df2)
+
+    x = np.linspace(q(plower), q(pupper), res)
+    if conf is None:
+        ci = np.array([x[0], x[-1]])
+    else:
+        ci = np.asarray(q(np.array([(1 - conf) / 2, 1 - (1 - conf) / 2])),
+                        dtype=float)
+    curve = Curve(x=x, y=np.asarray(d(x), dtype=float), ci=ci)
+    for a in curve:
+        a.setflags(write=False)
+    return curve
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,149 @@
+"""====================================================
+                    DOWNSAMPLE
+
+Reduces a line series with millions of points down to a few thousand points
+that look the same once drawn, so that it can be plotted quickly and without
+running out of memory. Two methods are provided:
+
+    minmax: Splits the series into buckets of consecutive points (one per
+            pixel column), and keeps the smallest and largest value of each.
+            This preserves the full vertical extent of the line in every
+            pixel column, so spikes are never lost.
+    lttb:   Largest-Triangle-Three-Buckets (Steinarsson, 2013). Keeps the one
+            point per bucket that forms the largest triangle with the points
+            kept in the neighbouring buckets. This preserves the overall
+            shape with fewer points, but can drop isolated spikes.
+
+Both assume the x values are sorted.
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+import numpy as np
+
+__author__ = 'Ronny Restrepo'
+
+METHODS = ("minmax", "lttb")
+
+
+# ==============================================================================
+#                                                                       DECIMATE
+# ==============================================================================
+def decimate(x, y, threshold, method="minmax"):
+    """
+    Downsamples the line through the points (x, y) to at most around
+    `threshold` points. Returns the (x, y) arrays unchanged if there are not
+    more points than that, or if x is not sorted in increasing order.
+
+    :param x:           array. x values, sorted in increasing order
+    :param y:           array. y values
+    :param threshold:   int. Number of points to keep
+    :param method:      str. "minmax" (default), or "lttb"
+    :return:            tuple of the (x, y) arrays of the points kept
+    """
+    if method not in METHODS:
+        raise ValueError("Unknown value for method: {}. Must be one of "
+                         "{}".format(method, METHODS))
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) <= threshold or np.any(np.diff(x) < 0):
+        return x, y
+    if method == "minmax":
+        idx = minmax_indices(y, threshold // 2)
+    else:
+        idx = lttb_indices(x, y, threshold)
+    return x[idx], y[idx]
+
+
+def threshold_for_width(pixels, method="minmax"):
+    """ Number of points to keep for a plot that is `pixels` wide. minmax
+        keeps two points per pixel column, lttb keeps one.
+    """
+    return int(pixels) * (2 if method == "minmax" else 1)
+
+
+def decimate_for_figure(x, y, fig, method="minmax", threshold=None):
+    """
+    Downsamples the line through the points (x, y) for drawing on the
+    matplotlib figure `fig`. Unless a threshold is given, the number of points
+    kept is based on the width of the figure in pixels.
+
+    :param x:           array. x values, sorted in increasing order
+    :param y:           array. y values
+    :param fig:         matplotlib Figure the line will be drawn on
+    :param method:      str. "minmax", or "lttb". Or None (or False) to not
+                        downsample at all
+    :param threshold:   int. Number of points to keep
+    :return:            tuple of the (x, y) arrays of the points kept
+    """
+    if not method:
+        return x, y
+    if threshold is None:
+        threshold = threshold_for_width(fig.get_figwidth() * fig.dpi, method)
+    return decimate(x, y, threshold, method=method)
+
+
+# ==============================================================================
+#                                                                         MINMAX
+# ==============================================================================
+def minmax_indices(y, buckets):
+    """
+    Indices of the smallest and largest value in each of `buckets` buckets of
+    consecutive values of y (plus the first and last points), in increasing
+    order.
+    """
+    n = len(y)
+    buckets = max(int(buckets), 1)
+    size = -(-n // buckets)         # ceil, so there are at most `buckets`
+    full = n // size
+    blocks = y[:full * size].reshape(full, size)
+    offsets = np.arange(full) * size
+    idx = [[0], blocks.argmin(axis=1) + offsets,
+           blocks.argmax(axis=1) + offsets, [n - 1]]
+    if full * size < n:
+        rest = y[full * size:]
+        idx.append([full * size + rest.argmin(), full * size + rest.argmax()])
+    return np.unique(np.concatenate(idx))
+
+
+# ==============================================================================
+#                                                                           LTTB
+# ==============================================================================
+def lttb_indices(x, y, threshold):
+    """
+    Indices of the `threshold` points selected by the Largest-Triangle-Three-
+    Buckets algorithm, in increasing order.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # The first and last points are always kept. The points in between are
+    # split into threshold - 2 buckets.
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    # The third point of the triangle for the last bucket is the last point
+    avg_x = np.append(avg_x[1:], x[n - 1])
+    avg_y = np.append(avg_y[1:], y[n - 1])
+
+    out = np.empty(threshold, dtype=np.intp)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Twice the area of the triangles formed by the previously selected
+        # point, each point in this bucket, and the average of the next bucket
+        area = np.abs((x[a] - avg_x[i]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (avg_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,194 @@
+"""====================================================
+                    INSTRUMENT
+
+Opt in profiling of the public pyrpy functions. When enabled, every call of an
+instrumented function records its latency and the size of its input, and the
+totals per function can be exported as a table or as JSON.
+
+It is enabled by either:
+    - setting the environment variable PYRPY_PROFILE before pyrpy is
+      imported. If it is set to the path of a ".json" file, then the summary
+      is written to that file when the process exits, otherwise it is printed
+      to stderr.
+    - the profiling() context manager, eg:
+
+        from pyrpy.instrument import profiling, summary_table
+        with profiling():
+            run_job()
+        print(summary_table())
+
+When disabled, the only cost is a check of a flag on each call. The records
+are protected by a lock, so it can be used from many threads at once.
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+__author__ = 'Ronny Restrepo'
+
+ENV_VAR = "PYRPY_PROFILE"
+
+_lock = threading.Lock()
+_stats = {}
+
+
+class _State(object):
+    enabled = False
+    depth = 0           # number of active profiling() blocks
+    enabled_outside = False     # enabled outside of any profiling() block
+
+
+_state = _State()
+
+
+# ==============================================================================
+#                                                                     INSTRUMENT
+# ==============================================================================
+def instrument(func):
+    """
+    Decorator that records the calls of func while profiling is enabled.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _state.enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _record(name, time.perf_counter() - start,
+                    _size(args[0]) if args else 0)
+    return wrapper
+
+
+def _size(x):
+    """ Number of values in the (first) argument of a call """
+    size = getattr(x, "size", None)
+    if isinstance(size, int):
+        return size
+    if isinstance(x, (list, tuple)):
+        return len(x)
+    if isinstance(x, (str, bytes, os.PathLike)):
+        return 0
+    return 1
+
+
+def _record(name, elapsed, size):
+    with _lock:
+        s = _stats.get(name)
+        if s is None:
+            s = _stats[name] = {"calls": 0, "total_time": 0.0,
+                                "max_time": 0.0, "total_size": 0,
+                                "max_size": 0}
+        s["calls"] += 1
+        s["total_time"] += elapsed
+        s["total_size"] += size
+        if elapsed > s["max_time"]:
+            s["max_time"] = elapsed
+        if size > s["max_size"]:
+            s["max_size"] = size
+
+
+# ==============================================================================
+#                                                                        CONTROL
+# ==============================================================================
+def enable():
+    """ Starts recording calls """
+    _state.enabled = True
+
+
+def disable():
+    """ Stops recording calls. The records collected so far are kept. """
+    _state.enabled = False
+
+
+def reset():
+    """ Clears all of the records """
+    with _lock:
+        _stats.clear()
+
+
+@contextmanager
+def profiling(reset_stats=False):
+    """
+    Context manager that records calls within its block. Blocks can be nested,
+    and recording stays enabled until the outermost block exits (or for good,
+    if it was already enabled by the PYRPY_PROFILE environment variable).
+
+    :param reset_stats: bool. Clear the existing records first?
+    """
+    if reset_stats:
+        reset()
+    with _lock:
+        if _state.depth == 0:
+            _state.enabled_outside = _state.enabled
+        _state.depth += 1
+        _state.enabled = True
+    try:
+        yield
+    finally:
+        with _lock:
+            _state.depth -= 1
+            if _state.depth == 0:
+                _state.enabled = _state.enabled_outside
+
+
+# ==============================================================================
+#                                                                         EXPORT
+# ==============================================================================
+def summary():
+    """
+    Returns a dict mapping the name of each function called, to a dict of
+    its number of calls, total, mean and max time (seconds), and total and max
+    input size. The functions are ordered by their total time, largest first.
+    """
+    with _lock:
+        stats = {name: dict(s) for name, s in _stats.items()}
+    for s in stats.values():
+        s["mean_time"] = s["total_time"] / s["calls"]
+    return dict(sorted(stats.items(), key=lambda item: -item[1]["total_time"]))
+
+
+def summary_table():
+    """ Returns the summary() as a printable table """
+    lines = ["{:<20}{:>10}{:>12}{:>12}{:>12}{:>14}".format(
+        "function", "calls", "total (s)", "mean (s)", "max (s)", "total size")]
+    for name, s in summary().items():
+        lines.append("{:<20}{:>10}{:>12.4g}{:>12.4g}{:>12.4g}{:>14}".format(
+            name, s["calls"], s["total_time"], s["mean_time"], s["max_time"],
+            s["total_size"]))
+    return "\n".join(lines)
+
+
+def to_json(path=None):
+    """
+    Returns the summary() as a JSON string, and writes it to path (if given).
+    """
+    text = json.dumps(summary(), indent=2)
+    if path is not None:
+        with open(path, "w") as f:
+            f.write(text)
+    return text
+
+
+def _report_at_exit(target):
+    if target.endswith(".json"):
+        to_json(target)
+    else:
+        print(summary_table(), file=sys.stderr)
+
+
+_env = os.environ.get(ENV_VAR, "")
+if _env not in ("", "0"):
+    enable()
+    atexit.register(_report_at_exit, _env)
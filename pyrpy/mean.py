@@ -1,40 +1,70 @@
-from scipy.stats import tmean
+import warnings
+
+import numpy as np
+from pyrpy.chunked import (is_out_of_core, open_memmap, chunked_moments,
+                           blocked_moments)
+from pyrpy.instrument import instrument
 
 # ==============================================================================
 #                                                                           MEAN
 # ==============================================================================
-def mean(x, trim=0, na_rm=False):
+@instrument
+def mean(x, trim=0, na_rm=False, chunksize=None, threads=None, axis=None):
     """
     Compute the trimmed mean.
-    This function finds the arithmetic mean of given values, ignoring values
-    outside the given `limits`.
+    This function finds the arithmetic mean of given values, optionally
+    ignoring a fraction of the smallest and largest values.
 
     Parameters
     ----------------------------------------------------------------------------
-    x : array_like
-        Array of values.
-    trim: int, optional
-        NOT IMPLEMENTED YET
+    x : array_like, numpy.memmap, or str
+        Array of values. This can also be a memory mapped array, or the path
+        to a ".npy" file, or a raw binary file of float64 values. These get
+        processed out of core (see Notes).
+    trim: float, optional
         The fraction (0 to 0.5) of observations to be trimmed from each end of
         x before the mean is computed. Values of trim outside that range are
         taken as the nearest endpoint.
         Default is 0.
     na_rm: bool, optional
-        NOT IMPLEMENTED YET
         A boolean value indicating whether missing values should be
         stripped before the computation proceeds.
         Default is False
+    chunksize: int, optional
+        Number of values read per chunk when processing out of core.
+        Default is 2**20
+    threads: int, optional
+        Number of threads used to process the chunks when processing out of
+        core. Default is the number of cpus.
+    axis: None or int, optional
+        Axis along which the means are computed. The default (None) is to
+        compute the mean of the flattened array.
 
     Returns
     ----------------------------------------------------------------------------
-    mean : float
-        The arithmetic mean
+    mean : float or array
+        The arithmetic mean (an array of means if axis is given)
+
+    Notes
+    ----------------------------------------------------------------------------
+    Memory mapped arrays and files are read in fixed size chunks, so memory
+    use stays bounded no matter how large the data is. The chunks are
+    summarised in parallel threads, and combined in a numerically stable way
+    (see pyrpy.accumulator.Accumulator). This does not apply when trimming, or
+    when an axis is given, in which case the data is read into memory.
+
+    The trimmed mean uses partial selection at the two trim ranks (like R,
+    which drops floor(n * trim) values from each end), rather than a full
+    sort. So it takes O(n) time. If trim is 0.5 or more, then it returns the
+    median.
 
     Examples
     ----------------------------------------------------------------------------
     >>> from pyrpy import *
     >>> mean(c(5, 10, 6, 9, 7, 8))
     7.5
+    >>> mean(c(1, 2, 3, 4, 100), trim=0.2)
+    3.0
 
     See Also
     ----------------------------------------------------------------------------
@@ -42,7 +72,65 @@ def mean(x, trim=0, na_rm=False):
     mode: Mode
     """
     # ==========================================================================
-    # TODO: implement trim
-    # TODO: implement na_rm
-    return tmean(x, limits=None, inclusive=(True, True))
+    if is_out_of_core(x) and axis is None and not trim > 0:
+        return chunked_moments(x, na_rm=na_rm, chunksize=chunksize,
+                               threads=threads).mean()
+    if is_out_of_core(x):
+        x = open_memmap(x)
+
+    x = np.asarray(x, dtype=float)
+    if axis is None:
+        x = x.ravel()
+        axis = 0
+
+    with warnings.catch_warnings():
+        # Means of empty (or all missing) slices are nan, same as R
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if not trim > 0 or x.shape[axis] == 0:
+            if na_rm:
+                # Removes the missing values one block at a time, rather
+                # than copying the whole array like np.nanmean()
+                return blocked_moments(x, axis=axis, na_rm=True,
+                                       chunksize=chunksize).mean()
+            return np.mean(x, axis=axis)
+        return _trimmed_mean(x, trim=trim, na_rm=na_rm, axis=axis)
+
+
+def _trimmed_mean(x, trim, na_rm, axis):
+    """ Trimmed mean along an axis, using partial selection at the trim ranks.
+    """
+    n_missing = np.isnan(x).sum(axis=axis)
+    if na_rm:
+        n = x.shape[axis] - n_missing     # values per lane, without missing
+    else:
+        n = np.full_like(n_missing, x.shape[axis])
+
+    if trim >= 0.5:
+        out = np.nanmedian(x, axis=axis) if na_rm else np.median(x, axis=axis)
+    elif np.all(n == n.flat[0]):
+        # Same number of values in every lane. Missing values get placed at
+        # the end by partition(), so the first n ranks are the valid values.
+        n = int(n.flat[0])
+        lo = int(np.floor(n * trim))
+        hi = n - lo
+        if hi <= lo:
+            out = np.full(n_missing.shape, np.nan)[()]
+        else:
+            part = np.partition(x, [lo, hi - 1], axis=axis)
+            middle = [slice(None)] * x.ndim
+            middle[axis] = slice(lo, hi)
+            out = part[tuple(middle)].mean(axis=axis)
+    else:
+        # Different number of missing values in each lane, so the trim ranks
+        # differ too. Fall back to a full sort, and mask the middle ranks.
+        lo = np.floor(n * trim)
+        hi = n - lo
+        ranks = np.arange(x.shape[axis]).reshape(
+            [-1 if i == axis else 1 for i in range(x.ndim)])
+        keep = ((ranks >= np.expand_dims(lo, axis))
+                & (ranks < np.expand_dims(hi, axis)))
+        out = np.where(keep, np.sort(x, axis=axis), 0).sum(axis=axis) / (hi - lo)
 
+    if not na_rm:
+        out = np.where(n_missing > 0, np.nan, out)[()]
+    return out
@@ -1,9 +1,45 @@
-from scipy.stats import norm
+import numpy as np
+from scipy.special import ndtr, ndtri, ndtri_exp, log_ndtr
+from pyrpy.tails import tail_probs, is_batched, stack_regions
+from pyrpy.rng import get_rng
+from pyrpy.instrument import instrument
 
 # TODO: Verify the outputs of these functions, make sure i implemented them
 #       correctly
 
+# The d/p/q functions are computed directly from the closed forms using the
+# numpy/scipy.special ufuncs, instead of going through scipy.stats.norm, whose
+# rv_continuous machinery adds a lot of per call overhead (argument checking,
+# broadcasting of loc/scale, etc) that dominates the cost for scalar inputs.
+_LOG_SQRT_2PI = 0.5 * np.log(2 * np.pi)
+_SQRT_2PI = np.sqrt(2 * np.pi)
 
+# Plain scalars skip the conversion to arrays, which is most of the remaining
+# cost of a scalar call.
+_SCALAR_TYPES = (float, int, np.float64)
+
+
+def _asfloat(x):
+    """ Returns x as a float array (or leaves it alone if a scalar) """
+    if x.__class__ in _SCALAR_TYPES:
+        return x
+    return np.asarray(x, dtype=float)
+
+
+def _check_sd(sd):
+    """ Returns sd as a float array (or scalar), where invalid (non-positive)
+        values of sd are replaced with nan, so they propagate to the outputs
+        the same way they do in scipy.stats
+    """
+    if sd.__class__ in _SCALAR_TYPES:
+        return sd if sd > 0 else np.nan
+    sd = np.asarray(sd, dtype=float)
+    if (sd <= 0).any():
+        sd = np.where(sd > 0, sd, np.nan)
+    return sd
+
+
+@instrument
 def cnorm(mean=0, sd=1, type="equal", conf=0.95):
     """
     ============================================================================
@@ -16,7 +52,11 @@ def cnorm(mean=0, sd=1, type="equal", conf=0.95):
     dnorm(x, mean=0, sd=1, log=False)
     pnorm(q, mean=0, sd=1, lowertail=True, log=False)
     qnorm(p, mean=0, sd=1, lowertail=True, log=False)
-    rnorm(n=1, mean=0, sd=1)
+    rnorm(n=1, mean=0, sd=1, rng=None)
+
+    Any of the arguments can also be given as arrays, to calculate many
+    confidence regions in one vectorized pass. The arrays are broadcast against
+    each other.
 
     :param mean (float): mean of the distribution
     :param sd (float):   standard deviation
@@ -24,37 +64,35 @@ def cnorm(mean=0, sd=1, type="equal", conf=0.95):
            "equal" (Default) for two tailed test
            "less" for one-tailed test where alternative hypotheis is 'less than'
            "more" for one-tailed test where alternative hypotheis is 'more than'
+           "greater" same as "more"
     :param conf (float): confidence interval used
     :return: a list with two values representing the lower and upper points that
              fit within your confidence interval.
+             If any of the arguments is an array, then it returns a (k, 2)
+             array instead, with one [lower, upper] row per region.
+    :raises ValueError: if type is not one of the values listed above.
 
     Examples:
     cnorm(mean=50, sd=15.5, type="equal", conf=0.99)
     cnorm(mean=50, sd=15.5, type="less", conf=0.95)
     cnorm(mean=50, sd=15.5, type="more", conf=0.90)
+    cnorm(mean=50, sd=15.5, type=["less", "equal"], conf=[0.95, 0.99])
     ============================================================================
     """
-
     # Account for the different types of cutoff quantiles
-    alpha = 1 - conf
-    if (type == "less"):
-        p_lower = alpha
-        p_upper = 1.0
-    elif (type == "more"):
-        p_lower = 0.0
-        p_upper = conf
-    elif (type == "equal"):
-        p_lower= alpha/2
-        p_upper = 1 - (alpha/2)
+    p_lower, p_upper = tail_probs(type, conf)
 
     # calculate the cutoff points
     cutoff_lower = qnorm(p_lower, mean=mean, sd=sd, lowertail=True)
     cutoff_upper = qnorm(p_upper, mean=mean, sd=sd, lowertail=True)
 
+    if is_batched(mean, sd, type, conf):
+        return stack_regions(cutoff_lower, cutoff_upper)
     return [cutoff_lower, cutoff_upper]
 
 
-def rnorm(n=1, mean=0, sd=1):
+@instrument
+def rnorm(n=1, mean=0, sd=1, rng=None):
     """
     ============================================================================
                                                                          rnorm()
@@ -67,11 +105,15 @@ def rnorm(n=1, mean=0, sd=1):
     dnorm(x, mean=0, sd=1, log=False)
     pnorm(q, mean=0, sd=1, lowertail=True, log=False)
     qnorm(p, mean=0, sd=1, lowertail=True, log=False)
-    rnorm(n=1, mean=0, sd=1)
+    rnorm(n=1, mean=0, sd=1, rng=None)
 
     :param n (int):      size of the array
     :param mean (float): mean of the distribution
     :param sd (float):   standard deviation
+    :param rng:     None, int or numpy.random.Generator. The random number
+                    generator to draw from. If None, then uses the global
+                    generator (see set_seed()). If an int, then it is used as
+                    the seed of a new generator.
     :return:        returns an array of random numbers
 
     EXAMPLES:
@@ -83,11 +125,14 @@ def rnorm(n=1, mean=0, sd=1):
     rnorm(10, mean=50, sd=15.5) # returns 10 random numbers from a normal
                            # distribution with a mean of 50 and standard
                            # deviation of 15.5
+
+    rnorm(10, rng=42)      # returns the same 10 random numbers every time
     ============================================================================
     """
-    return norm.rvs(loc=mean, scale=sd, size=n)
+    return get_rng(rng).normal(loc=mean, scale=sd, size=n)
 
 
+@instrument
 def dnorm(x, mean=0, sd=1, log=False):
     """
     ============================================================================
@@ -101,7 +146,7 @@ def dnorm(x, mean=0, sd=1, log=False):
     dnorm(x, mean=0, sd=1, log=False)
     pnorm(q, mean=0, sd=1, lowertail=True, log=False)
     qnorm(p, mean=0, sd=1, lowertail=True, log=False)
-    rnorm(n=1, mean=0, sd=1)
+    rnorm(n=1, mean=0, sd=1, rng=None)
 
     :param x (float, array of floats): The value(s) of x
     :param mean (float): mean of the distribution
@@ -110,13 +155,16 @@ def dnorm(x, mean=0, sd=1, log=False):
     :return:        returns an array of density values
     ============================================================================
     """
+    sd = _check_sd(sd)
+    z = (_asfloat(x) - _asfloat(mean)) / sd
     if log:
-        return norm.logpdf(x, loc=mean, scale=sd)
+        return -0.5 * z * z - _LOG_SQRT_2PI - np.log(sd)
     else:
-        return norm.pdf(x, loc=mean, scale=sd)
+        return np.exp(-0.5 * z * z) / (_SQRT_2PI * sd)
 
 
-def qnorm(q, mean=0, sd=1, lowertail=True):
+@instrument
+def qnorm(q, mean=0, sd=1, lowertail=True, log=False):
     """
     ============================================================================
                                                                          qnorm()
@@ -130,23 +178,30 @@ def qnorm(q, mean=0, sd=1, lowertail=True):
     dnorm(x, mean=0, sd=1, log=False)
     pnorm(q, mean=0, sd=1, lowertail=True, log=False)
     qnorm(p, mean=0, sd=1, lowertail=True, log=False)
-    rnorm(n=1, mean=0, sd=1)
+    rnorm(n=1, mean=0, sd=1, rng=None)
 
     :param q (float, array of floats): The quantile(s)
     :param mean (float):     mean of the distribution
     :param sd (float):       standard deviation
     :param lowertail (bool): lowertail (true), or survival (false)
+    :param log (bool):       are the quantiles q given as log probabilities?
     :return:        an array of the value(s) corresponding to the quantiles q
     ============================================================================
     """
-    # TODO: check that q is between 0.0 and 1.0
-
-    if lowertail:
-        return norm.ppf(q=q, loc=mean, scale=sd)
+    # Quantiles outside of [0, 1] result in nan
+    q = _asfloat(q)
+    if log:
+        # Inverted on the log scale, which keeps the precision of log
+        # probabilities that are far below 0 (or very close to it)
+        z = ndtri_exp(q)
     else:
-        return norm.isf(q=q, loc=mean, scale=sd)
+        z = ndtri(q)
+    if not lowertail:
+        z = -z      # upper tail, by symmetry of the distribution
+    return _asfloat(mean) + _check_sd(sd) * z
 
 
+@instrument
 def pnorm(x, mean=0, sd=1, lowertail=True, log=False):
     """
     ============================================================================
@@ -164,7 +219,7 @@ def pnorm(x, mean=0, sd=1, lowertail=True, log=False):
     dnorm(x, mean=0, sd=1, log=False)
     pnorm(q, mean=0, sd=1, lowertail=True, log=False)
     qnorm(p, mean=0, sd=1, lowertail=True, log=False)
-    rnorm(n=1, mean=0, sd=1)
+    rnorm(n=1, mean=0, sd=1, rng=None)
 
     :param x (float, array of floats): The values along the distribution.
     :param mean (float):     mean of the distribution
@@ -175,12 +230,11 @@ def pnorm(x, mean=0, sd=1, lowertail=True, log=False):
     :return:        an array of quantiles() corresponding to the values in x
     ============================================================================
     """
-    if lowertail and not log:
-        return norm.cdf(x, loc=mean, scale=sd)
-    elif not lowertail and not log:
-        return norm.sf(x, loc=mean, scale=sd)
-    elif lowertail and log:
-        return norm.logcdf(x, loc=mean, scale=sd)
+    z = (_asfloat(x) - _asfloat(mean)) / _check_sd(sd)
+    if not lowertail:
+        z = -z      # upper tail, by symmetry of the distribution
+    if log:
+        return log_ndtr(z)
     else:
-        return norm.logsf(x, loc=mean, scale=sd)
+        return ndtr(z)
 
@@ -1,20 +1,35 @@
-from matplotlib import pyplot as plt
+from pyrpy.axes import get_axes, add_grid, show
+from pyrpy.downsample import decimate_for_figure
+from pyrpy.instrument import instrument
 
-def plot(x, y):
+@instrument
+def plot(x, y, decimate="minmax", threshold=None, ax=None):
     """
     plots
     :param x: (array like)
         the data
+    :param y: (array like)
+        the data
+    :param decimate: (str)
+        How to downsample long series before plotting them, so that they
+        render quickly and look the same: "minmax" (keeps the smallest and
+        largest value of each pixel column), "lttb" (largest triangle three
+        buckets), or None to plot every point. Only applies when x is sorted.
+        See pyrpy.downsample
+    :param threshold: (int)
+        Series with more than this many points get downsampled to this many
+        points. By default it is based on the width of the figure in pixels.
+    :param ax: (matplotlib Axes)
+        Axes to draw on. By default it draws on the current pyplot axes, and
+        renders the plot. If given, the plot is not rendered.
     """
-
-
-    plt.plot(x,y, color='#0066FF', alpha=0.7)
+    axes = get_axes(ax)
+    x, y = decimate_for_figure(x, y, axes.figure, method=decimate,
+                               threshold=threshold)
+    axes.plot(x,y, color='#0066FF', alpha=0.7)
 
     # Add Grid lines
-    plt.minorticks_on()
-    plt.grid(b=True, which='major', color='#666666', linestyle='-')
-    plt.grid(b=True, which='minor', color='#999999', linestyle='-', alpha=0.2)
+    add_grid(axes)
 
     # Render the plot
-    plt.show()
-
+    show(ax, primary=True)
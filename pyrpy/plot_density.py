@@ -1,31 +1,55 @@
-from matplotlib import pyplot as plt
-from numpy import linspace
-from scipy.stats import gaussian_kde
+from pyrpy.axes import get_axes, add_grid, show
+from pyrpy.density import density
+from pyrpy.downsample import decimate_for_figure
+from pyrpy.instrument import instrument
 
-def plot_density(x, primary=True):
+@instrument
+def plot_density(x, primary=True, bw="nrd0", adjust=1, kernel="gaussian",
+                 n=512, cut=3, decimate="minmax", threshold=None,
+                 ax=None):
     """
     Creates a density plot of the data.
 
-    Code is based on this forum message http://stackoverflow.com/a/4152016
+    The density is estimated using pyrpy.density.density(), which bins the
+    data and convolves it with the kernel using the FFT, so it stays fast
+    even for millions of values.
 
     :param x: (array like)
         the data
+    :param primary: (bool)
+        Render the plot?
+    :param bw: (float or str)
+        the bandwidth, or the rule to select it ("nrd0", "nrd", "SJ",
+        "SJ-dpi"). See density()
+    :param adjust: (float)
+        the bandwidth used is actually adjust * bw
+    :param kernel: (str)
+        the kernel to use. See density()
+    :param n: (int)
+        number of points the density is plotted at
+    :param cut: (float)
+        the density is plotted from cut * bw below the smallest value, to
+        cut * bw above the largest
+    :param decimate: (str)
+        How to downsample the density curve when n is larger than the plot
+        is wide: "minmax", "lttb", or None. See pyrpy.plot.plot()
+    :param threshold: (int)
+        Number of points the curve is downsampled to. By default it is based
+        on the width of the figure in pixels.
+    :param ax: (matplotlib Axes)
+        Axes to draw on. By default it draws on the current pyplot axes. If
+        given, the plot is not rendered.
     """
 
     # Calculate the density points
-    density = gaussian_kde(x)
-    # TODO: COme up with a better start and end point
-    xs = linspace(min(x)-1, max(x)+1, 200)
-    density.covariance_factor = lambda : 0.25
-    density._compute_covariance()
-    plt.plot(xs,density(xs), color='#0066FF', alpha=0.7)
+    d = density(x, bw=bw, adjust=adjust, kernel=kernel, n=n, cut=cut)
+    axes = get_axes(ax)
+    xs, ys = decimate_for_figure(d.x, d.y, axes.figure, method=decimate,
+                                 threshold=threshold)
+    axes.plot(xs, ys, color='#0066FF', alpha=0.7)
 
     # Add Grid lines
-    plt.minorticks_on()
-    plt.grid(b=True, which='major', color='#666666', linestyle='-')
-    plt.grid(b=True, which='minor', color='#999999', linestyle='-', alpha=0.2)
+    add_grid(axes)
 
     # Render the plot
-    if primary:
-        plt.show()
-
+    show(ax, primary)
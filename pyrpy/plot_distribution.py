@@ -4,13 +4,11 @@
 =======================================================
 """
 __author__ = 'Ronny Restrepo'
-#import matplotlib.pyplot as plt
 
-from pyrpy.binom import dbinom
-from pyrpy.t import qt, dt, ct
+from pyrpy.distribution_curve import distribution_curve
 from pyrpy.shade_between import shade_between
-from matplotlib.pyplot import axvline as vline
-from matplotlib import pyplot as plt
+from pyrpy.axes import get_axes, show
+from pyrpy.instrument import instrument
 
 # TODO: Create another function to show a normal curve/t curve of two samples
 #       on top of each other, along with confidence intervals, just so we can
@@ -19,10 +17,11 @@ from matplotlib import pyplot as plt
 
 
 
+@instrument
 def plot_distribution(dist="normal", mean=None, sd=None, n=None, p=None,
                       df=None, df2=None, rate=None, conf=0.95, res=200,
                       returndf=False,
-                      primary=True, plower=0.0001, pupper=0.9999):
+                      primary=True, plower=0.0001, pupper=0.9999, ax=None):
     """
     ===========================================================================
                                                              PLOT DISTRIBUTION
@@ -57,7 +56,9 @@ def plot_distribution(dist="normal", mean=None, sd=None, n=None, p=None,
                 data points along the x axis)
                 Not implemented for Poisson distribution yet.
                 DEFAULT = 200 if using normal distribution
-    returndf : should it return a dataframe of the x and y values?
+    returndf : should it return the x and y values (and the confidence
+                interval)? See distribution_curve(), which computes these
+                without plotting.
                 DEFAULT = FALSE
     primary   : boolean. Whether to plot as primary plot using plot() or
                  append to an exisitng plot using points()
@@ -71,136 +72,76 @@ def plot_distribution(dist="normal", mean=None, sd=None, n=None, p=None,
       pupper : numeric. quantile used to calculate the upper end of the
                 x axis to plot.
                 DEFAULT = 0.9999
+    ax        : matplotlib Axes to draw on. By default it draws on the
+                current pyplot axes. If given, the plot is not rendered.
     ...       : other parameters to pass onto the plot
     """
-    # TODO: implement shading of confidence intervals
-    # TODO: implement other distributiuons
     # TODO: Check the data types of the inputs
-    # TODO: Add option to draw exponential distribution using either lambda OR 
-    #       the mean (where mean = 1/lambda) or sd (sd=1/lambda). But give
-    #       preference in this order (lambda, mean, sd) if more than one of 
-    #       those arguments is given.  
-    # TODO: currently the vertical line is plotting median not mean
     # TODO: implement show.mean option
 
-    from numpy import linspace, array
+    curve = distribution_curve(dist=dist, mean=mean, sd=sd, n=n, p=p, df=df,
+                               df2=df2, rate=rate, conf=conf, res=res,
+                               plower=plower, pupper=pupper)
+    x, y, CI = curve
+    axes = get_axes(ax)
 
     #-------------------------------------------------------------------------
-    #                                               Handle Normal Distribution
+    #                                          Handle Continuous Distributions
     #-------------------------------------------------------------------------
-    if (dist=="normal"):
-        print("TODO: implement Normal curve")
-     
-    #-------------------------------------------------------------------------
-    #                                                    Handle t Distribution
-    #-------------------------------------------------------------------------
-    elif (dist=="t"):
-        # TODO: check the data types of the inputs
-        if df == None: df = 10
-
-        # Use mean and sd to shift and scale the t distribution to actual data.
-        if mean == None: mean=0
-        if sd == None: sd=1
-
-        # Calculate range of values to plot on x axis
-        x_min = qt(plower, df=df)
-        x_max = qt(pupper, df=df)
-
-        x = linspace(x_min, x_max, res)
-
-        # Calculate corresponding y values
-        y = dt(x, df=df)
-
-        # Scale and shift the x axis
-        x = x*sd + mean
-        x_min = x[0]
-        x_max = x[-1]
-
-        # CONFIDENCE INTERVAL
+    if dist in ("normal", "t", "exp", "f"):
         if conf is not None:
             assert isinstance(conf, float), \
                 "Argument *conf* in plot_distribution() must either be a \n"\
                 "'None' or a 'float'. Not a '{}'".format(type(conf))
-            CI = array(ct(df=df, type="equal", conf=conf)) * sd + mean
-            title = "t Distribution with\n df={} and confidence interval of "\
-                    "{}".format(df, conf)
+        if dist == "normal":
+            title = "Normal Distribution with\n mean={} and sd={}".format(
+                0 if mean is None else mean, 1 if sd is None else sd)
+        elif dist == "t":
+            title = "t Distribution with\n df={}".format(
+                10 if df is None else df)
+        elif dist == "exp":
+            title = "Exponential Distribution"
         else:
-            CI = [x[0], x[-1]]
-            title = "T Distribution with\n df={}".format(df)
+            title = "F Distribution with\n df={} and df2={}".format(
+                10 if df is None else df, 100 if df2 is None else df2)
+        if conf is not None:
+            title += " and confidence interval of {}".format(conf)
 
         shade_between(x, y, lower=CI[0], upper=CI[1],
-                      shade_col="blue", main=title, primary=False)
-        vline(x=mean, color='#0033CC', alpha=0.9, linewidth=2.0)
-
-        if primary:
-            plt.show()
-
-        #plt.plot(x, y)
-        # plt.xticks(x)  # only show tick labels for actual values
-        #plt.xlim([x_min, x_max])  # xlimits to fit entire plot snugly
-
-
-        #shade_between(x, y, lower=CI[1], upper=CI[2], primary=primary,
-        #                  type="l", shade.col = "green", main = title, ...)
-
-
-        # y2 = [0 if ((x[i] > ci_lower) and (x[i] < ci_upper))
-        #       else y[i]
-        #       for i in range(len(x))]
-        # plt.fill_between(x, y, y2, facecolor='blue', alpha=0.5)
-
+                      shade_col="blue", main=title, primary=False, ax=axes)
+        if dist in ("normal", "t"):
+            axes.axvline(x=0 if mean is None else mean, color='#0033CC',
+                        alpha=0.9, linewidth=2.0)
 
-
-
-
-    #-------------------------------------------------------------------------
-    #                                                  Handle exp Distribution
     #-------------------------------------------------------------------------
-    elif (dist=="exp"):
-        pass
-    
+    #                                            Handle Discrete Distributions
     #-------------------------------------------------------------------------
-    #                                              Handle Poisson Distribution
-    #-------------------------------------------------------------------------
-    elif (dist=="poisson"):
-        pass
-    
-    #-------------------------------------------------------------------------
-    #                                             Handle Binomial Distribution
-    #-------------------------------------------------------------------------
-    elif (dist=="binomial"):
-        #TODO: check the data types of the inputs
-        if n == None: n = 1
-        if p == None: p = 0.5
-        #x_min = qbinom(plower, size=n, prob=p)
-        #x_max = qbinom(pupper, size=n, prob=p)
-        #x = range(int(round(x_min)), int(round(x_max)) + 1)
-        x = range(0, n + 1)
-        y = dbinom(x, n, prob=p)
-
-        title = "Binomial Distribution with\n n={} and p={}".format(n,p)
-        plt.bar(x, y, width=1,
-                alpha=0.5,
-                color='b', edgecolor="#FF0000",
-                align="center")
-        plt.xticks(x)               # only show tick labels for actual values
-        plt.xlim([-0.5, n + 0.5])   # xlimits to fit entire plot snugly
+    else:
+        if dist == "binomial":
+            title = "Binomial Distribution with\n n={} and p={}".format(
+                1 if n is None else n, 0.5 if p is None else p)
+            xlab = 'Number of Successes out of {} trials'.format(x[-1])
+        else:
+            title = "Poisson Distribution with\n lambda={}".format(
+                1 if mean is None else mean)
+            xlab = 'Number of Events'
+        axes.bar(x, y, width=1,
+                 alpha=0.5,
+                 color='b', edgecolor="#FF0000",
+                 align="center")
+        axes.set_xticks(x)          # only show tick labels for actual values
+        axes.set_xlim([x[0] - 0.5, x[-1] + 0.5])  # xlimits to fit snugly
+
+        axes.set_xlabel(xlab)
+        axes.set_ylabel('probability')
+        axes.set_title(title)
 
-        plt.xlabel('Number of Successes out of {} trials'.format(n))
-        plt.ylabel('probability')
-        plt.title(title)
+        # TODO: create a vertical line for the mean
 
-        plt.show()
+    show(ax, primary)
 
-        # TODO: create a vertical line for the mean
-    
     #-------------------------------------------------------------------------
-    #                                 Return the dataframe if it was requested
+    #                                 Return the curve values if requested
     #-------------------------------------------------------------------------
-    #if (return.df):
-    #    return(data.frame(x, y))
-     
-    else:
-        pass
-
-
+    if returndf:
+        return curve
@@ -3,9 +3,11 @@ from pyrpy.plot_density import plot_density
 from pyrpy.plot_distribution import plot_distribution
 from pyrpy.mean import mean
 from pyrpy.sd import sd
-from matplotlib import pyplot as plt
+from pyrpy.axes import get_axes, show
+from pyrpy.instrument import instrument
 
-def plot_hypothesis(x, conf=0.95):
+@instrument
+def plot_hypothesis(x, conf=0.95, ax=None):
     """
     Plots a density distribution of the actual data, along with a t distribution
     of the likely range of values for the mean given the sample size, with a
@@ -17,10 +19,14 @@ def plot_hypothesis(x, conf=0.95):
 
     :param x:
     :param conf:
+    :param ax: matplotlib Axes to draw on. By default it draws on the current
+               pyplot axes. If given, the plot is not rendered.
     :return:
     """
     # TODO: Make the two plots actually overlay on top of each other.
     SE = sd(x) / sqrt(len(x))
-    plot_distribution("t", df=len(x)-1, mean=mean(x), sd=SE, primary=False)
-    plot_density(x, primary=False)
-    plt.show()
+    axes = get_axes(ax)
+    plot_distribution("t", df=len(x)-1, mean=mean(x), sd=SE, conf=conf,
+                      primary=False, ax=axes)
+    plot_density(x, primary=False, ax=axes)
+    show(ax, primary=True)
@@ -0,0 +1,392 @@
+"""====================================================
+                    POIS
+
+The Poisson distribution, with the same R style functions as the binomial
+distribution (see binom.py): dpois, ppois, qpois, rpois, and the confidence
+region cpois.
+
+The pmf and cumulative tables of a given lambda cover the outcomes 0..K,
+where K is far enough into the upper tail that the pmf (and the survival
+function) underflow to 0, and the cdf rounds to 1. So lookups beyond the end
+of a table are exact too.
+=======================================================
+"""
+__author__ = 'Ronny Restrepo'
+
+import numpy as np
+from scipy.stats import poisson
+from pyrpy.binom import (_QFUZZ, _SCALAR_TYPES, _lookup, _pmf_lookup,
+                         _log_lookup, _as_integer)
+from pyrpy.tails import tail_probs, is_batched, stack_regions
+from pyrpy.table_cache import TableCache
+from pyrpy.rng import get_rng
+from pyrpy.instrument import instrument
+
+# Log of the smallest subnormal double. The pmf underflows to 0 below it.
+_LOG_UNDERFLOW = -745.2
+
+# Like R, the quantiles at cumulative probabilities within about an epsilon
+# of 1 are infinite (the cdf never gets any closer to 1 than that in double
+# precision)
+_QINF = 1.01 * np.finfo(float).eps
+
+
+# ==============================================================================
+#                                                                    TABLE CACHE
+# ==============================================================================
+def _table_size(lambda_):
+    """ Returns the last outcome K covered by the tables of lambda_, ie the
+        first outcome above the mode where the pmf underflows to 0.
+    """
+    k = int(np.ceil(lambda_ + 40 * np.sqrt(lambda_) + 40))
+    while poisson.logpmf(k, lambda_) > _LOG_UNDERFLOW:
+        k *= 2
+    return k
+
+
+def _build_tables(key):
+    """ Builds the pmf, cdf and survival function tables over the outcomes
+        0..K, for a value of lambda.
+    """
+    k = np.arange(_table_size(key) + 1)
+    return (poisson.pmf(k, key),
+            poisson.cdf(k, key),
+            poisson.sf(k, key))
+
+
+_cache = TableCache(_build_tables)
+
+
+def pois_cache(maxbytes=64 * 2**20):
+    """
+    Enables (or disables) the cache of Poisson probability tables.
+
+    When the cache is enabled, the first call to dpois, ppois, qpois or
+    cpois for a given (scalar) lambda builds the pmf and cumulative tables for
+    all the outcomes 0..K (where K is far enough into the upper tail that
+    the probabilities beyond it underflow). Subsequent calls with the same
+    lambda are then answered by indexing into (or searching) those tables,
+    which is much faster than going through scipy.stats each time.
+
+    :param maxbytes: int. Memory budget in bytes for all the cached tables.
+                     Each lambda takes up 24 * (K + 1) bytes, where K is
+                     around lambda + 40 * sqrt(lambda) + 40 (eg 25MB for
+                     lambda=1e6).
+                     When the budget is exceeded, the least recently used
+                     tables get evicted.
+                     Use 0 to disable (and clear) the cache.
+                     DEFAULT = 64MB
+    :return: None
+
+    EXAMPLES:
+    pois_cache()                    # enable with 64MB budget
+    pois_cache(maxbytes=2**30)      # enable with 1GB budget
+    pois_cache(0)                   # disable
+    """
+    _cache.configure(maxbytes)
+
+
+def pois_cache_info():
+    """
+    Statistics of the cache of Poisson probability tables.
+
+    :return: dict with the number of "hits", "misses" and "evictions", as well
+             as the number of "entries", and memory used ("nbytes") out of the
+             memory budget ("maxbytes").
+    """
+    return _cache.info()
+
+
+def _table_key(lambda_):
+    """ Returns the key of the tables for lambda_, or None if it is not a
+        valid scalar.
+    """
+    if lambda_.__class__ not in _SCALAR_TYPES:
+        return None
+    if not 0 <= lambda_ < np.inf:
+        return None
+    return float(lambda_)
+
+
+def _cached_tables(lambda_):
+    """ Returns the cached (pmf, cdf, sf) tables for lambda_ and the last
+        outcome K they cover, or (None, None) if the cache is disabled, or
+        can not be used for this lambda.
+    """
+    if not _cache.enabled:
+        return None, None
+    key = _table_key(lambda_)
+    if key is None:
+        return None, None
+    tables = _cache.get(key)
+    return tables, len(tables[0]) - 1
+
+
+@instrument
+def cpois(lambda_=1, type="equal", conf=0.95):
+    """
+    ============================================================================
+                                                                           cpois
+    ============================================================================
+    Confidence region for a Poisson Distribution.
+
+    Any of the arguments can also be given as arrays, to calculate many
+    confidence regions in one vectorized pass. The arrays are broadcast against
+    each other.
+
+    Args:
+    :param lambda_ (float): mean number of events
+    :param type (string): type of hypothesis test taken.
+           "equal" (Default) for two tailed test
+           "less" for one-tailed test where alternative hypotheis is 'less than'
+           "more" for one-tailed test where alternative hypotheis is 'more than'
+           "greater" same as "more"
+    :param conf (float): confidence interval used
+    :return: a list with two values representing the lower and upper points that
+             fit within your confidence interval.
+             If any of the arguments is an array, then it returns a (k, 2)
+             array instead, with one [lower, upper] row per region.
+    :raises ValueError: if type is not one of the values listed above.
+
+    Examples:
+    cpois(lambda_=4, type="equal", conf=0.99)
+    cpois(lambda_=15, type="less", conf=0.95)
+    cpois(lambda_=[1, 10, 100], type="equal", conf=0.90)
+    ============================================================================
+    """
+    # Account for the different types of cutoff quantiles
+    p_lower, p_upper = tail_probs(type, conf)
+
+    # calculate the cutoff points
+    cutoff_lower = qpois(p_lower, lambda_=lambda_, lowertail=True)
+    cutoff_upper = qpois(p_upper, lambda_=lambda_, lowertail=True)
+
+    if is_batched(lambda_, type, conf):
+        return stack_regions(cutoff_lower, cutoff_upper)
+    return [cutoff_lower, cutoff_upper]
+
+
+@instrument
+def rpois(n=1, lambda_=1, rng=None):
+    """
+    ============================================================================
+                                                                         rpois()
+    ============================================================================
+    Creates an array of random numbers from a Poisson distribution, ie random
+    counts of events, where lambda_ events are expected.
+
+    Large values of lambda_ are drawn in constant time per value (numpy uses
+    the transformed rejection method for lambda_ >= 10, rather than counting
+    up the events).
+
+    USAGE:
+    dpois(x, lambda_=1, log=False)
+    ppois(x, lambda_=1, lowertail=True, log=False)
+    qpois(q, lambda_=1, lowertail=True)
+    rpois(n=1, lambda_=1, rng=None)
+
+    :param n:       int. size of the array
+    :param lambda_: float (or array of floats). Mean number of events
+    :param rng:     None, int or numpy.random.Generator. The random number
+                    generator to draw from. If None, then uses the global
+                    generator (see set_seed()). If an int, then it is used as
+                    the seed of a new generator.
+    :return:        returns an array of random numbers
+
+    EXAMPLES:
+    rpois(10, lambda_=4)        # returns eg 10 counts of events
+    rpois(10, 4, rng=42)        # returns the same 10 counts every time
+    ============================================================================
+    """
+    return get_rng(rng).poisson(lam=lambda_, size=n)
+
+
+@instrument
+def dpois(x, lambda_=1, log=False):
+    """
+    ============================================================================
+                                                                         dpois()
+    ============================================================================
+    Density Function for the Poisson distribution.
+    Returns the probability of getting "x" events, when "lambda_" events are
+    expected.
+
+    USAGE:
+    dpois(x, lambda_=1, log=False)
+    ppois(x, lambda_=1, lowertail=True, log=False)
+    qpois(q, lambda_=1, lowertail=True)
+    rpois(n=1, lambda_=1, rng=None)
+
+    :param x:       int. or array of ints. The number of events
+    :param lambda_: float. Mean number of events
+    :param log:     bool. take the log?
+    :return:
+    ============================================================================
+    """
+    tables, size = _cached_tables(lambda_)
+    if tables is not None:
+        pmf = _pmf_lookup(x, tables[0], size)
+        if log:
+            return _log_lookup(pmf, x, lambda x: poisson.logpmf(x, lambda_))
+        return pmf
+
+    if log:
+        return poisson.logpmf(x, lambda_)
+    else:
+        return poisson.pmf(x, lambda_)
+
+
+@instrument
+def qpois(q, lambda_=1, lowertail=True):
+    """
+    ============================================================================
+                                                                         qpois()
+    ============================================================================
+    The quantile function for the Poisson distribution.
+    You provide a quantile (eg q=0.75) or array of quantiles, and it returns the
+    value along the Poisson distribution that corresponds to the qth quantile.
+
+    USAGE:
+    dpois(x, lambda_=1, log=False)
+    ppois(x, lambda_=1, lowertail=True, log=False)
+    qpois(q, lambda_=1, lowertail=True)
+    rpois(n=1, lambda_=1, rng=None)
+
+    When there are many quantiles to look up for a single lambda_, the
+    cumulative probabilities of the outcomes 0..K are computed once, and all
+    the quantiles are found with a single binary search over them (this is
+    also done when the pois_cache() is enabled).
+
+    :param q:       float. or array of floats. The quantile ()
+    :param lambda_: float. Mean number of events
+    :param lowertail bool. lowertail (true), or survival (false)
+    :return:        an array of the value(s) corresponding to the quantiles q.
+                    These are integers, unless any of the values is nan (eg
+                    for quantiles outside of [0, 1]) or infinite (the quantile
+                    at q=1, or at q=0 for the upper tail), in which case they
+                    are floats.
+    ============================================================================
+    """
+    tables, size = _cached_tables(lambda_)
+    if tables is not None:
+        table = tables[1] if lowertail else tables[2]
+        return _qpois_search(q, size, table, lowertail=lowertail)
+
+    # Build the cumulative table, if it costs less than searching for each q
+    key = _table_key(lambda_)
+    size = _table_size(key) if key is not None and np.size(q) > 1 else None
+    if size is not None and 4 * np.size(q) > size:
+        k = np.arange(size + 1)
+        if lowertail:
+            table = poisson.cdf(k, lambda_)
+        else:
+            table = poisson.sf(k, lambda_)
+        return _qpois_search(q, size, table, lowertail=lowertail)
+
+    if lowertail:
+        x = poisson.ppf(q, lambda_)
+    else:
+        x = poisson.isf(q, lambda_)
+    infinite = _is_qinf(np.asarray(q, dtype=float), lowertail)
+    x = np.where(infinite, np.inf, x)[()]
+    # scipy returns -1 instead of 0 at the boundary (q=0, or q=1 for the
+    # upper tail), whereas R returns 0.
+    if q.__class__ in _SCALAR_TYPES and lambda_.__class__ in _SCALAR_TYPES:
+        x = max(x, 0.0)
+        return np.int64(x) if np.isfinite(x) else np.float64(x)
+    return _as_integer(np.maximum(x, 0)[()])
+
+
+@instrument
+def ppois(x, lambda_=1, lowertail=True, log=False):
+    """
+    ============================================================================
+                                                                         ppois()
+    ============================================================================
+    The cumulative distribution function for the Poisson distribution.
+    You provide a value along the Poisson distribution (eg x=3) or array of
+    values, and it returns what proportion of values lie below it (the quantile)
+
+    Alternatively, if you select lowertail=False, it returns the proportion of
+    values that are above it.
+
+    USAGE:
+    dpois(x, lambda_=1, log=False)
+    ppois(x, lambda_=1, lowertail=True, log=False)
+    qpois(q, lambda_=1, lowertail=True)
+    rpois(n=1, lambda_=1, rng=None)
+
+    :param x:       int. or array of ints. The values along the distribution.
+    :param lambda_: float. Mean number of events
+    :param lowertail bool. are you interested in what proportion of values lie
+                     beneath x?
+    :param log:     bool. take the log?
+    :return:        an array of quantiles() corresponding to the values in x
+    ============================================================================
+    """
+    tables, size = _cached_tables(lambda_)
+    if tables is not None:
+        k = np.floor(x) if x.__class__ in _SCALAR_TYPES else \
+            np.floor(np.asarray(x, dtype=float))
+        if lowertail:
+            out = _lookup(k, tables[1], 0.0, 1.0, size)
+        else:
+            out = _lookup(k, tables[2], 1.0, 0.0, size)
+        if log:
+            logfunc = poisson.logcdf if lowertail else poisson.logsf
+            return _log_lookup(out, k, lambda k: logfunc(k, lambda_))
+        return out
+
+    if lowertail and not log:
+        return poisson.cdf(x, lambda_)
+    elif not lowertail and not log:
+        return poisson.sf(x, lambda_)
+    elif lowertail and log:
+        return poisson.logcdf(x, lambda_)
+    else:
+        return poisson.logsf(x, lambda_)
+
+
+def _is_qinf(q, lowertail):
+    """ Whether the quantiles at q are infinite (see _QINF) """
+    p = q if lowertail else 1 - q
+    return (p + _QINF >= 1) & (p <= 1)
+
+
+def _qpois_search(q, size, table, lowertail=True):
+    """ Quantile function of the Poisson distribution, using a binary search
+        over the cumulative probabilities (the cdf if lowertail, otherwise the
+        survival function) of the outcomes 0..size, where size is the end of
+        the tables (see _table_size()).
+        Follows the same conventions as R at the boundaries.
+    """
+    if q.__class__ in _SCALAR_TYPES:
+        if not 0 <= q <= 1:
+            return np.float64(np.nan)
+        elif _is_qinf(q, lowertail):
+            return np.float64(np.inf)
+        elif lowertail:
+            x = 0 if q == 0 else \
+                np.searchsorted(table, q * (1 - _QFUZZ), side="left")
+        else:
+            x = 0 if q == 1 else size + 1 - \
+                np.searchsorted(table[::-1], q * (1 + _QFUZZ), side="right")
+        return np.int64(x)
+
+    q = np.asarray(q, dtype=float)
+    if lowertail:
+        # Smallest x such that P(X <= x) >= q
+        x = np.searchsorted(table, q * (1 - _QFUZZ), side="left")
+        x = np.where(q == 0, 0, x)
+    else:
+        # Smallest x such that P(X > x) <= q. Reversing the survival function
+        # gives an increasing view of it that can be searched.
+        j = np.searchsorted(table[::-1], q * (1 + _QFUZZ), side="right") - 1
+        x = np.where(q == 1, 0, size - j)
+    x = np.where(_is_qinf(q, lowertail), np.inf, x)
+    valid = (q >= 0) & (q <= 1)
+    return _as_integer(np.where(valid, x, np.nan)[()])
+
+
+if __name__ == '__main__':
+    print("This is the Poisson distribution module")
@@ -0,0 +1,215 @@
+"""====================================================
+                    QUANTILE
+
+Sample quantiles and medians, using all nine of the quantile definitions of
+R's quantile() (Hyndman and Fan, 1996).
+
+The data is ordered once for all of the requested probabilities, so asking
+for 100 quantiles costs about the same as asking for a few. A single quantile
+(eg a median) only needs a partial sort (np.partition) at its rank.
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+import numpy as np
+from pyrpy.instrument import instrument
+
+__author__ = 'Ronny Restrepo'
+
+# (a, b) of the continuous quantile types 4, 5, 6, 8 and 9 (type 7 is
+# computed separately, like in R)
+_AB = {4: (0, 1), 5: (0.5, 0.5), 6: (0, 0), 8: (1 / 3, 1 / 3),
+       9: (3 / 8, 3 / 8)}
+_FUZZ = 4 * np.finfo(float).eps
+
+
+# ==============================================================================
+#                                                                       QUANTILE
+# ==============================================================================
+@instrument
+def quantile(x, probs=(0, 0.25, 0.5, 0.75, 1), na_rm=False, type=7,
+             axis=None):
+    """
+    Sample quantiles of x, for the given probabilities, like R's quantile().
+
+    ARGS:
+    ---------------------
+    :param x (array like):
+        The values.
+    :param probs (float or array like):
+        Probabilities, between 0 and 1.
+    :param na_rm (bool):
+        Should missing values be removed? If False, and there are missing
+        values, then it raises a ValueError (like R).
+    :param type (int):
+        Which of R's nine quantile algorithms to use (see R's ?quantile).
+        Types 1 to 3 are discontinuous (1 is the inverse of the empirical
+        distribution function), and types 4 to 9 interpolate between the
+        order statistics. Type 7 is the default in R (and in numpy).
+    :param axis (None or int):
+        Axis along which to compute the quantiles. If None, then uses all of
+        the values of x.
+
+    RETURN:
+    ---------------------
+    :return: array of the quantiles, with the shape of probs (followed by the
+             remaining dimensions of x, when an axis is given).
+
+    EXAMPLES:
+    ---------------------
+    >>> quantile([1, 2, 3, 4, 10])
+    array([ 1.,  2.,  3.,  4., 10.])
+    >>> quantile([1, 2, 3, 4, 10], probs=[0.1, 0.9], type=6)
+    array([ 1. , 10. ])
+    """
+    # ==========================================================================
+    if type not in range(1, 10):
+        raise ValueError("'type' must be one of 1, 2, ..., 9")
+    probs = np.asarray(probs, dtype=float)
+    eps = 100 * np.finfo(float).eps
+    if np.any((probs < -eps) | (probs > 1 + eps)):
+        raise ValueError("'probs' outside [0,1]")
+    probs = np.clip(probs, 0, 1)
+    return _quantile(x, probs, type, na_rm, axis, missing="raise")
+
+
+# ==============================================================================
+#                                                                         MEDIAN
+# ==============================================================================
+@instrument
+def median(x, na_rm=False, axis=None):
+    """
+    Sample median of x, like R's median().
+
+    :param x:       array like
+    :param na_rm:   bool. Should missing values be removed? If False, and
+                    there are missing values, then the median is nan.
+    :param axis:    None or int. Axis along which to compute the medians. If
+                    None, then uses all of the values of x.
+    :return:        the median (an array of them, when an axis is given).
+
+    EXAMPLES:
+    >>> median([5, 3, 1, 4])
+    3.5
+    """
+    return _quantile(x, np.float64(0.5), 7, na_rm, axis, missing="nan")
+
+
+# ==============================================================================
+#                                                                        HELPERS
+# ==============================================================================
+def _positions(n, probs, type):
+    """
+    Returns the 0 based ranks lo and hi, of the order statistics to
+    interpolate between for each probability, in a sample of size n, and the
+    weight h of the upper one (following R's quantile.default).
+    """
+    if type == 7:
+        index = 1 + (n - 1) * probs
+        j = np.floor(index)
+        h = index - j
+    elif type <= 3:
+        nppm = n * probs - 0.5 if type == 3 else n * probs
+        j = np.floor(nppm + _FUZZ)
+        if type == 1:
+            h = (nppm > j).astype(float)
+        elif type == 2:
+            h = ((nppm > j) + 1) / 2
+        else:
+            h = ((nppm != j) | (j % 2 == 1)).astype(float)
+    else:
+        a, b = _AB[type]
+        nppm = a + probs * (n + 1 - a - b)
+        j = np.floor(nppm + _FUZZ)
+        h = nppm - j
+        h[np.abs(h) < _FUZZ] = 0
+    # Missing probabilities give missing quantiles (for every type)
+    h = np.where(np.isnan(probs), np.nan, h)
+
+    # R pads the sorted values with two copies of the minimum and maximum, so
+    # the 1 based rank j (and j + 1) is clamped to [1, n]
+    j = np.nan_to_num(j).astype(np.intp)
+    lo = np.clip(j, 1, n) - 1
+    hi = np.clip(j + 1, 1, n) - 1
+    return lo, hi, h
+
+
+def _order_statistics(m, n, lo, hi, inplace):
+    """
+    Returns the order statistics of ranks lo and hi (0 based) of each row of
+    m, whose first n values are not missing.
+
+    A single rank (eg a median, or any single quantile) is found with a
+    partial sort at just that rank (the next order statistic, when it is
+    needed, is the minimum of the values above it). Otherwise a full sort is
+    used, as numpy's vectorized sort is faster than np.partition() at two or
+    more ranks.
+    """
+    if not inplace:
+        m = m.copy()
+    ranks = np.unique(lo)
+    if len(ranks) > 1:
+        m.sort(axis=1)
+        return m[:, lo], m[:, hi]
+    k = ranks[0]
+    m.partition(k, axis=1)
+    xlo = np.repeat(m[:, [k]], len(lo), axis=1)
+    xhi = xlo.copy()
+    if k + 1 < n and np.any(hi > k):
+        xhi[:, hi > k] = m[:, k + 1:n].min(axis=1)[:, None]
+    return xlo, xhi
+
+
+def _interpolate(xlo, xhi, h):
+    """ Quantiles from the order statistics xlo and xhi, and the weight h """
+    with np.errstate(invalid="ignore"):
+        other = (0 < h) & (h < 1) & (xlo != xhi)
+        out = np.where(h == 1, xhi, xlo)
+        out = np.where(other, (1 - h) * xlo + h * xhi, out)
+    out[:, np.isnan(h)] = np.nan
+    return out
+
+
+def _quantile(x, probs, type, na_rm, axis, missing):
+    """
+    Quantiles of x along axis. All of the rows (ie slices along axis) with the
+    same number of values are ordered in a single call, for all of the
+    probabilities at once.
+    """
+    x = np.asarray(x)
+    if x.dtype.kind != "f":
+        x = x.astype(float)
+    if axis is None:
+        m, shape = x.reshape(1, -1), ()
+    else:
+        x = np.moveaxis(x, axis, -1)
+        shape = x.shape[:-1]
+        m = x.reshape(-1, x.shape[-1])
+    flat = probs.ravel()
+    out = np.full((m.shape[0], flat.size), np.nan)
+
+    # Missing values (nan) are placed last when ordering, so each row is
+    # ordered as is, using its number of non missing values as its size.
+    nans = np.count_nonzero(np.isnan(m), axis=1)
+    if missing == "raise" and not na_rm and nans.any():
+        raise ValueError("missing values and NaN's not allowed if 'na_rm' "
+                         "is False")
+    counts = m.shape[1] - nans
+    usable = (nans == 0) | na_rm
+    for n in np.unique(counts[usable]):
+        if n == 0:
+            continue
+        rows = np.flatnonzero(usable & (counts == n))
+        lo, hi, h = _positions(int(n), flat, type)
+        if len(rows) == m.shape[0]:
+            xlo, xhi = _order_statistics(m, n, lo, hi, inplace=False)
+        else:
+            xlo, xhi = _order_statistics(m[rows], n, lo, hi, inplace=True)
+        out[rows] = _interpolate(xlo, xhi, h)
+
+    out = np.moveaxis(out, 1, 0).reshape(probs.shape + shape)
+    return out[()] if out.ndim == 0 else out
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,123 @@
+"""====================================================
+                    RENDER
+
+Renders many figures to image files in one go, spread across a process pool.
+Each figure is drawn on its own matplotlib Figure with the Agg canvas, and
+written straight to a file. This never touches the global pyplot state, so it
+does not need a display, does not leak figures, and nothing is shown.
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+import importlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from pyrpy.instrument import instrument
+
+__author__ = 'Ronny Restrepo'
+
+# Plotting functions that can be rendered, mapped to the modules defining them
+PLOT_FUNCS = {
+    "plot": "pyrpy.plot",
+    "plot_density": "pyrpy.plot_density",
+    "plot_distribution": "pyrpy.plot_distribution",
+    "plot_hypothesis": "pyrpy.plot_hypothesis",
+    "shade_between": "pyrpy.shade_between",
+}
+
+
+# ==============================================================================
+#                                                                   RENDER BATCH
+# ==============================================================================
+@instrument
+def render_batch(specs, outdir=".", format="png", processes=None, dpi=100,
+                 figsize=(6.4, 4.8)):
+    """
+    Renders a list of plots to image files, spread across a process pool.
+
+    ARGS:
+    ---------------------
+    :param specs (list of dicts):
+        One dict per figure, with the keys:
+            "func":    name of the plotting function, eg "plot_density"
+            "args":    (optional) list of positional arguments to it
+            "kwargs":  (optional) dict of keyword arguments to it
+            "path":    (optional) file to write the figure to. The format is
+                       taken from its extension.
+            "figsize": (optional) (width, height) of the figure in inches
+            "dpi":     (optional) resolution of the figure
+    :param outdir (str):
+        Directory the figures without a "path" are written to, as
+        figure_00000.png, figure_00001.png, etc (numbered by their position in
+        specs).
+    :param format (str):
+        Format of the figures without a "path", eg "png" or "svg".
+    :param processes (None or int):
+        Number of worker processes. If None, then uses the number of cpus. If
+        1, then everything is rendered in the current process.
+    :param dpi (int):
+        Default resolution of the figures.
+    :param figsize (tuple):
+        Default (width, height) of the figures in inches.
+
+    RETURN:
+    ---------------------
+    :return: list of the paths of the files written, in the same order as
+             specs.
+
+    RAISES:
+    ---------------------
+    ValueError if the function of any spec is not one of the plotting
+    functions listed in PLOT_FUNCS.
+
+    EXAMPLES:
+    ---------------------
+    render_batch([{"func": "plot_distribution", "kwargs": {"dist": "t",
+                                                           "df": df}}
+                  for df in range(1, 31)], outdir="reports", processes=4)
+    """
+    # ==========================================================================
+    tasks = []
+    for i, spec in enumerate(specs):
+        if spec["func"] not in PLOT_FUNCS:
+            raise ValueError("Unknown plotting function: {}. Must be one of "
+                             "{}".format(spec["func"], sorted(PLOT_FUNCS)))
+        spec = dict(spec)
+        spec.setdefault("path", os.path.join(
+            outdir, "figure_{:05d}.{}".format(i, format)))
+        spec.setdefault("figsize", figsize)
+        spec.setdefault("dpi", dpi)
+        tasks.append(spec)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes == 1 or len(tasks) <= 1:
+        return list(map(_render, tasks))
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        chunksize = max(1, len(tasks) // (4 * processes))
+        return list(executor.map(_render, tasks, chunksize=chunksize))
+
+
+def _render(spec):
+    """ Renders a single figure of render_batch() in a worker process """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    func = getattr(importlib.import_module(PLOT_FUNCS[spec["func"]]),
+                   spec["func"])
+    fig = Figure(figsize=spec["figsize"], dpi=spec["dpi"])
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
+    func(*spec.get("args", ()), ax=ax, **spec.get("kwargs", {}))
+
+    path = spec["path"]
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fig.savefig(path)
+    return path
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,171 @@
+"""====================================================
+                    RANDOM NUMBER GENERATION
+
+Seeding and random streams used by the r* functions (rnorm, rbinom, rt, ...).
+All of them draw from a numpy.random.Generator, which is either passed in
+explicitly using their `rng` argument, or the global one set by set_seed().
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from pyrpy.instrument import instrument
+
+__author__ = 'Ronny Restrepo'
+__all__ = ["set_seed", "get_rng", "spawn_rngs", "rparallel"]
+
+# The global generator. Created the first time it is needed, unless set_seed()
+# is called before that.
+_global_rng = None
+
+
+# ==============================================================================
+#                                                                       SET_SEED
+# ==============================================================================
+@instrument
+def set_seed(seed):
+    """
+    Sets the seed of the global random number generator, so that subsequent
+    calls to the r* functions (rnorm, rbinom, rt, ...) are reproducible.
+    Equivalent to R's set.seed()
+
+    ARGS:
+    ---------------------
+    :param seed (int or None):
+        the seed. If None, then fresh entropy is pulled from the OS.
+
+    EXAMPLES:
+    ---------------------
+    set_seed(42)
+    rnorm(3)
+    """
+    # ==========================================================================
+    global _global_rng
+    _global_rng = np.random.default_rng(seed)
+
+
+# ==============================================================================
+#                                                                        GET_RNG
+# ==============================================================================
+def get_rng(rng=None):
+    """
+    Returns the random number generator to use.
+
+    ARGS:
+    ---------------------
+    :param rng (None, int, SeedSequence or Generator):
+        If None, then the global generator (see set_seed()) is returned.
+        If a Generator, it is returned as is. Otherwise a new Generator is
+        seeded with it.
+
+    RETURN:
+    ---------------------
+    :return: numpy.random.Generator
+    """
+    # ==========================================================================
+    global _global_rng
+    if rng is None:
+        if _global_rng is None:
+            _global_rng = np.random.default_rng()
+        return _global_rng
+    return np.random.default_rng(rng)
+
+
+# ==============================================================================
+#                                                                     SPAWN_RNGS
+# ==============================================================================
+@instrument
+def spawn_rngs(n, seed=None):
+    """
+    Creates `n` statistically independent random number generators, eg to
+    give one to each worker of a process pool.
+
+    ARGS:
+    ---------------------
+    :param n (int):
+        number of generators
+    :param seed (None, int or SeedSequence):
+        Root seed that all the generators are derived from. The same seed
+        always gives the same generators.
+
+    RETURN:
+    ---------------------
+    :return: list of numpy.random.Generator
+
+    EXAMPLES:
+    ---------------------
+    rngs = spawn_rngs(4, seed=42)
+    rnorm(10, rng=rngs[0])
+    """
+    # ==========================================================================
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return [np.random.default_rng(child) for child in seed.spawn(n)]
+
+
+# ==============================================================================
+#                                                                      RPARALLEL
+# ==============================================================================
+@instrument
+def rparallel(rfunc, n, seed=None, processes=None, blocksize=2**20, **kwargs):
+    """
+    Draws `n` random numbers using one of the r* functions, spread across a
+    process pool.
+
+    The n values are split up into fixed size blocks, and each block is
+    drawn from its own independent stream, derived from `seed` and the
+    position of the block. So for a given seed (and blocksize), the output is
+    bit for bit identical no matter how many processes are used.
+
+    ARGS:
+    ---------------------
+    :param rfunc (callable):
+        The r* function to use, eg rnorm, rbinom, rt. It needs to be importable
+        from the worker processes.
+    :param n (int):
+        number of values to draw
+    :param seed (None, int or SeedSequence):
+        Root seed for the streams.
+    :param processes (None or int):
+        Number of worker processes. If None, then uses the number of cpus. If
+        1, then everything is drawn in the current process.
+    :param blocksize (int):
+        Number of values drawn from each stream.
+    :param **kwargs:
+        Other arguments to pass on to rfunc (eg mean and sd for rnorm)
+
+    RETURN:
+    ---------------------
+    :return: array of n random numbers
+
+    EXAMPLES:
+    ---------------------
+    rparallel(rnorm, 10**8, seed=42, mean=50, sd=15.5)
+    rparallel(rbinom, 10**8, seed=42, processes=4, size=10, prob=0.3)
+    """
+    # ==========================================================================
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    starts = range(0, n, blocksize)
+    tasks = [(rfunc, min(blocksize, n - start), child, kwargs)
+             for start, child in zip(starts, seed.spawn(len(starts)))]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes == 1 or len(tasks) <= 1:
+        blocks = list(map(_draw_block, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            blocks = list(executor.map(_draw_block, tasks))
+    if not blocks:
+        return rfunc(0, rng=get_rng(seed), **kwargs)
+    return np.concatenate(blocks)
+
+
+def _draw_block(task):
+    """ Draws a single block of rparallel() in a worker process """
+    rfunc, n, seed, kwargs = task
+    return rfunc(n, rng=np.random.default_rng(seed), **kwargs)
@@ -1,9 +1,12 @@
-from scipy.stats import tstd
+from pyrpy.chunked import (is_out_of_core, open_memmap, chunked_moments,
+                           blocked_moments)
+from pyrpy.instrument import instrument
 
 # ==============================================================================
 #                                                                             SD
 # ==============================================================================
-def sd(x, na_rm=False):
+@instrument
+def sd(x, na_rm=False, chunksize=None, threads=None, axis=None):
     """
     Compute the standard deviation of the values in x.
 
@@ -12,24 +15,43 @@ def sd(x, na_rm=False):
 
     Parameters
     ----------------------------------------------------------------------------
-    x : array_like
-        Array of values.
+    x : array_like, numpy.memmap, or str
+        Array of values. This can also be a memory mapped array, or the path
+        to a ".npy" file, or a raw binary file of float64 values. These get
+        processed out of core (see Notes).
     na_rm: bool, optional
-        NOT IMPLEMENTED YET
         A boolean value indicating whether missing values should be
         stripped before the computation proceeds.
         Default is False
+    chunksize: int, optional
+        Number of values read per chunk when processing out of core.
+        Default is 2**20
+    threads: int, optional
+        Number of threads used to process the chunks when processing out of
+        core. Default is the number of cpus.
+    axis: None or int, optional
+        Axis along which the standard deviations are computed. The default
+        (None) is to compute the standard deviation of the flattened array.
 
     Returns
     ----------------------------------------------------------------------------
-    sd : float
-        The standard deviation
+    sd : float or array
+        The standard deviation (an array of standard deviations if axis is
+        given)
 
     Notes
     ----------------------------------------------------------------------------
     `sd` returns the unbiased sample standard deviation. Thus it divides by
     the correction factor of (n - 1) instead of n.
 
+    Memory mapped arrays and files are read in fixed size chunks, so memory
+    use stays bounded no matter how large the data is. The chunks are
+    summarised in parallel threads, and combined in a numerically stable way
+    (see pyrpy.accumulator.Accumulator). Arrays in memory (and memory mapped
+    arrays, when an axis is given) are processed the same way, one block of
+    rows at a time, so missing values are removed without copying the whole
+    array.
+
     Examples
     ----------------------------------------------------------------------------
     >>> from pyrpy import *
@@ -41,7 +63,13 @@ def sd(x, na_rm=False):
     var: Variance
     """
     # ==========================================================================
-    # TODO: implement na_rm
+    if is_out_of_core(x) and axis is None:
+        return chunked_moments(x, na_rm=na_rm, chunksize=chunksize,
+                               threads=threads).sd()
+    if is_out_of_core(x):
+        x = open_memmap(x)
+
     # TODO: consider adding option to calculate biased sample sd, dividing by n
     # TODO: consider adding trim as an argument and implementing it
-    return tstd(x, limits=None, inclusive=(True, True))
+    return blocked_moments(x, axis=axis, na_rm=na_rm,
+                           chunksize=chunksize).sd()
@@ -1,8 +1,10 @@
-import matplotlib.pyplot as plt
-from numpy import concatenate
+from numpy import asarray, empty, searchsorted
+from pyrpy.axes import get_axes, add_grid, show
+from pyrpy.instrument import instrument
 
+@instrument
 def shade_between(x, y, lower, upper, primary=True, type="l",
-                  shade_col="blue", main="", xlab="", ylab=""):
+                  shade_col="blue", main="", xlab="", ylab="", ax=None):
     """
     Plots a graph, with a shaded region
 
@@ -16,6 +18,8 @@ def shade_between(x, y, lower, upper, primary=True, type="l",
     :param main:
     :param xlab:
     :param ylab:
+    :param ax: matplotlib Axes to draw on. By default it draws on the current
+               pyplot axes. If given, the plot is not rendered.
     :return:
     """
     #---------------------------------------------------------------------------
@@ -23,29 +27,56 @@ def shade_between(x, y, lower, upper, primary=True, type="l",
     # ---------------------------------------------------------------------------
     # Splits the array up, so we can add duplicates of the cutoff points on the
     # x, otherwise we end up with lines that go up diagonally instead of
-    # straight up
-    below = [e for e in x if e <= lower]
-    above = [e for e in x if e >= upper]
-    i1 = len(below)
-    i2 = len(x) - len(above)
-
-    newx = concatenate([x[0:i1], [x[i1]], x[i1:i2], [x[i2]], x[i2:]])
-    newy = concatenate([y[0:i1], [y[i1]], y[i1:i2], [y[i2]], y[i2:]])
-    newy2 = concatenate([y[0:i1], [y[i1]], [0] * (i2 - i1), [0], y[i2:]])
+    # straight up.
+    x = asarray(x)
+    y = asarray(y)
+    n = len(x)
+    if n == 0:
+        # Nothing to plot, or to shade
+        newx, newy, newy2 = x, y, y
+    else:
+        newx, newy, newy2 = _split_at_cutoffs(x, y, n, lower, upper)
 
     # Generate the plot
-    plt.fill_between(newx, newy, newy2, color='#0066FF', alpha=0.7)
+    axes = get_axes(ax)
+    axes.fill_between(newx, newy, newy2, color='#0066FF', alpha=0.7)
 
     # Add Labels
-    plt.xlabel(xlab)
-    plt.ylabel(ylab)
-    plt.title(main)
+    axes.set_xlabel(xlab)
+    axes.set_ylabel(ylab)
+    axes.set_title(main)
 
     # Add Grid lines
-    plt.minorticks_on()
-    plt.grid(b=True, which='major', color='#666666', linestyle='-')
-    plt.grid(b=True, which='minor', color='#999999', linestyle='-', alpha=0.2)
+    add_grid(axes)
 
     # Display
-    if primary:
-        plt.show()
+    show(ax, primary)
+
+
+def _split_at_cutoffs(x, y, n, lower, upper):
+    """ Returns x and y with duplicates of the points at the cutoffs, and the
+        lower edge of the shaded region (0 between the cutoffs, y elsewhere)
+    """
+    # x is sorted, so the cutoff indices are found by binary search:
+    #   i1 = number of points <= lower
+    #   i2 = index of the first point >= upper
+    # They are clipped to the last point, for cutoffs that lie outside of x.
+    i1 = min(searchsorted(x, lower, side="right"), n - 1)
+    i2 = min(max(searchsorted(x, upper, side="left"), i1), n - 1)
+
+    # Same as concatenating [x[:i1], x[i1], x[i1:i2], x[i2], x[i2:]], but
+    # filled into preallocated arrays
+    newx = empty(n + 2, dtype=x.dtype)
+    newx[:i1 + 1] = x[:i1 + 1]
+    newx[i1 + 1:i2 + 2] = x[i1:i2 + 1]
+    newx[i2 + 2:] = x[i2:]
+
+    newy = empty(n + 2, dtype=y.dtype)
+    newy[:i1 + 1] = y[:i1 + 1]
+    newy[i1 + 1:i2 + 2] = y[i1:i2 + 1]
+    newy[i2 + 2:] = y[i2:]
+
+    # Shaded region goes down to 0, between the two cutoffs
+    newy2 = newy.copy()
+    newy2[i1 + 1:i2 + 2] = 0
+    return newx, newy, newy2
@@ -1,4 +1,7 @@
 from scipy.stats import t
+from pyrpy.tails import tail_probs, is_batched, stack_regions
+from pyrpy.rng import get_rng
+from pyrpy.instrument import instrument
 
 __author__ = 'Ronny Restrepo'
 __all__ = ["ct", "rt", "dt", "qt", "pt"]
@@ -11,10 +14,15 @@ __all__ = ["ct", "rt", "dt", "qt", "pt"]
 # ==============================================================================
 #                                                                             CT
 # ==============================================================================
+@instrument
 def ct(df=1, loc=0, scale=1, type="equal", conf=0.95):
     """
     Confidence region for a t Distribution.
 
+    Any of the arguments can also be given as arrays, to calculate many
+    confidence regions in one vectorized pass. The arrays are broadcast against
+    each other.
+
     ARGS:
     ---------------------
     :param df (int):
@@ -28,6 +36,7 @@ def ct(df=1, loc=0, scale=1, type="equal", conf=0.95):
            "equal" (Default) for two tailed test
            "less" for one-tailed test where alternative hypotheis is 'less than'
            "more" for one-tailed test where alternative hypotheis is 'more than'
+           "greater" same as "more"
     :param conf (float):
         confidence interval used.
         (default is 0.95)
@@ -37,35 +46,37 @@ def ct(df=1, loc=0, scale=1, type="equal", conf=0.95):
     :return:
         a list with two values representing the lower and upper points that
              fit within your confidence interval.
+        If any of the arguments is an array, then it returns a (k, 2) array
+        instead, with one [lower, upper] row per region.
+
+    RAISES:
+    ---------------------
+    ValueError if type is not one of the values listed above.
 
     EXAMPLES:
     ---------------------
     ct(df=15, conf=0.99)
     ct(df=15, type="less", conf=0.99)
     ct(df=15, type="more", conf=0.90)
+    ct(df=[5, 10, 15], type=["less", "equal", "more"], conf=0.95)
     """
     # ==========================================================================
     # Account for the different types of cutoff quantiles
-    alpha = 1 - conf
-    if (type == "less"):
-        p_lower = alpha
-        p_upper = 1.0
-    elif (type == "more"):
-        p_lower = 0.0
-        p_upper = conf
-    elif (type == "equal"):
-        p_lower= alpha/2
-        p_upper = 1 - (alpha/2)
+    p_lower, p_upper = tail_probs(type, conf)
 
     # calculate the cutoff points
     cutoff_lower = qt(p_lower, df=df, lowertail=True, loc=loc, scale=scale)
     cutoff_upper = qt(p_upper, df=df, lowertail=True, loc=loc, scale=scale)
+
+    if is_batched(df, loc, scale, type, conf):
+        return stack_regions(cutoff_lower, cutoff_upper)
     return [cutoff_lower, cutoff_upper]
 
 # ==============================================================================
 #                                                                             RT
 # ==============================================================================
-def rt(n=1, df=1, loc=0, scale=1, ncp=None):
+@instrument
+def rt(n=1, df=1, loc=0, scale=1, ncp=None, rng=None):
     """
     Creates an array of random numbers from a t distribution, where you
     can specify the number of items, and the degrees of freedom.
@@ -83,6 +94,10 @@ def rt(n=1, df=1, loc=0, scale=1, ncp=None):
     :param ncp (float):
         non-centrality parameter delta.
         Currently not implemented.
+    :param rng: None, int or numpy.random.Generator
+        The random number generator to draw from. If None, then uses the
+        global generator (see set_seed()). If an int, then it is used as
+        the seed of a new generator.
 
     RETURN:
     ---------------
@@ -98,13 +113,16 @@ def rt(n=1, df=1, loc=0, scale=1, ncp=None):
 
     rt(10, df=15)       # returns 10 random numbers from a t
                         # distribution with 15 degrees of freedom.
+
+    rt(10, rng=42)      # returns the same 10 random numbers every time
     """
     # ==========================================================================
-    return t.rvs(df=df, loc=loc, scale=scale, size=n)
+    return loc + scale * get_rng(rng).standard_t(df=df, size=n)
 
 # ==============================================================================
 #                                                                             DT
 # ==============================================================================
+@instrument
 def dt(x, df=1, loc=0, scale=1, ncp=None, log=False):
     """
     Density Function for the t distribution.
@@ -141,6 +159,7 @@ def dt(x, df=1, loc=0, scale=1, ncp=None, log=False):
 # ==============================================================================
 #                                                                             QT
 # ==============================================================================
+@instrument
 def qt(q, df=1, loc=0, scale=1, ncp=None, lowertail=True, log=False):
     """
     The quantile function for the t distribution.
@@ -186,6 +205,7 @@ def qt(q, df=1, loc=0, scale=1, ncp=None, lowertail=True, log=False):
 # ==============================================================================
 #                                                                             PT
 # ==============================================================================
+@instrument
 def pt(x, df=1, loc=0, scale=1, ncp=None, lowertail=True, log=False):
     """
     The cumulative distribution function for the t distribution.
@@ -0,0 +1,185 @@
+"""====================================================
+                    T_TEST
+
+Student's and Welch's t tests, like R's t.test(). Every argument can be an
+array, so that thousands of tests (eg one per column of a matrix, or one per
+metric of an A/B test) are computed together, in one vectorized pass.
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+from collections import namedtuple
+
+import numpy as np
+from pyrpy.chunked import blocked_moments
+from pyrpy.instrument import instrument
+from pyrpy.t import ct, pt
+from pyrpy.tails import tail_probs
+
+__author__ = 'Ronny Restrepo'
+
+TTest = namedtuple("TTest", ["statistic", "df", "p_value", "conf_int",
+                             "estimate", "stderr"])
+
+
+# ==============================================================================
+#                                                                         T_TEST
+# ==============================================================================
+@instrument
+def t_test(x, y=None, type="equal", mu=0, paired=False, var_equal=False,
+           conf=0.95, na_rm=False, axis=0):
+    """
+    One sample, two sample (Student's or Welch's), or paired t tests, like
+    R's t.test().
+
+    If x (and y) are matrices, then a separate test is done for each column
+    (or each slice along `axis`), all in one vectorized pass.
+
+    ARGS:
+    ---------------------
+    :param x (array like):
+        The values of the (first) sample.
+    :param y (None or array like):
+        The values of the second sample. If None, then does a one sample test.
+    :param type (string, or array of strings):
+        The alternative hypothesis (same conventions as ct()).
+           "equal" (Default) for two tailed test
+           "less" for one-tailed test where alternative hypotheis is 'less than'
+           "more" for one-tailed test where alternative hypotheis is 'more than'
+           "greater" same as "more"
+    :param mu (float or array):
+        The true mean (or difference in means) under the null hypothesis.
+    :param paired (bool):
+        Do a paired test? (ie a one sample test on x - y)
+    :param var_equal (bool):
+        Treat the variances of the two samples as equal? If True, then uses
+        the pooled variance (Student's test), otherwise uses Welch's
+        approximation of the degrees of freedom.
+    :param conf (float):
+        Confidence level of the confidence interval.
+    :param na_rm (bool):
+        Should missing values be removed? (for paired tests, the pairs with
+        a missing value are removed)
+    :param axis (None or int):
+        Axis along which the values of each sample lie. If None, then x and y
+        are flattened, and a single test is done.
+
+    RETURN:
+    ---------------------
+    :return: TTest namedtuple (see t_test_summary()), with one value (or one
+             row of conf_int) per test.
+
+    EXAMPLES:
+    ---------------------
+    t_test([5.1, 4.9, 5.6, 5.8, 6.0], mu=5)
+    t_test(control, treatment)                  # Welch test
+    t_test(control, treatment, paired=True)
+
+    # one test per column (eg per metric)
+    t_test(metrics_a, metrics_b, type="less")
+    """
+    # ==========================================================================
+    x = np.asarray(x)
+    if paired:
+        if y is None:
+            raise ValueError("'y' is missing for paired test")
+        x = x - np.asarray(y)
+        y = None
+
+    mx = blocked_moments(x, axis=axis, na_rm=na_rm)
+    if y is None:
+        return t_test_summary(mx.mean(), mx.sd(), mx.n, type=type, mu=mu,
+                              conf=conf)
+    my = blocked_moments(y, axis=axis, na_rm=na_rm)
+    return t_test_summary(mx.mean(), mx.sd(), mx.n, my.mean(), my.sd(), my.n,
+                          type=type, mu=mu, var_equal=var_equal, conf=conf)
+
+
+# ==============================================================================
+#                                                                 T_TEST_SUMMARY
+# ==============================================================================
+@instrument
+def t_test_summary(mean_x, sd_x, n_x, mean_y=None, sd_y=None, n_y=None,
+                   type="equal", mu=0, var_equal=False, conf=0.95):
+    """
+    t tests computed from the summary statistics of the samples (eg ones that
+    were accumulated out of core, or by group). All of the arguments can be
+    arrays, which are broadcast against each other, with one test per
+    element.
+
+    ARGS:
+    ---------------------
+    :param mean_x, sd_x, n_x (float or array):
+        Mean, standard deviation (dividing by n - 1) and size of the (first)
+        sample.
+    :param mean_y, sd_y, n_y (None, float or array):
+        Mean, standard deviation and size of the second sample. If None, then
+        does a one sample test.
+    :param type, mu, var_equal, conf:
+        Same as in t_test().
+
+    RETURN:
+    ---------------------
+    :return: TTest namedtuple with the attributes:
+                - statistic: the t statistics
+                - df:        the degrees of freedom
+                - p_value:   the p values
+                - conf_int:  the confidence intervals for the mean (or the
+                             difference in means), with [lower, upper] along
+                             the last axis
+                - estimate:  the mean of x (or the difference in means, x - y)
+                - stderr:    the standard errors of the estimates
+    """
+    # ==========================================================================
+    tail_probs(type, conf)      # validates type
+    mean_x, sd_x, n_x = (np.asarray(a, dtype=float)
+                         for a in (mean_x, sd_x, n_x))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if mean_y is None:
+            estimate = mean_x
+            df = n_x - 1
+            stderr = sd_x / np.sqrt(n_x)
+        else:
+            mean_y, sd_y, n_y = (np.asarray(a, dtype=float)
+                                 for a in (mean_y, sd_y, n_y))
+            estimate = mean_x - mean_y
+            if var_equal:
+                df = n_x + n_y - 2
+                pooled = ((n_x - 1) * sd_x**2 + (n_y - 1) * sd_y**2) / df
+                stderr = np.sqrt(pooled * (1 / n_x + 1 / n_y))
+            else:
+                se2_x, se2_y = sd_x**2 / n_x, sd_y**2 / n_y
+                stderr = np.sqrt(se2_x + se2_y)
+                df = (se2_x + se2_y)**2 / (se2_x**2 / (n_x - 1)
+                                           + se2_y**2 / (n_y - 1))
+        df = np.where(df > 0, df, np.nan)
+        statistic = (estimate - mu) / stderr
+
+    estimate, stderr, df, statistic, type, conf = np.broadcast_arrays(
+        estimate, stderr, df, statistic, type, conf)
+    p_value = _p_value(statistic, df, type)
+
+    # The cutoffs of the t distribution for the statistic, reversed around the
+    # estimate (eg the "less" region (q, inf) becomes the interval (-inf, u))
+    cutoffs = np.reshape(ct(df=df.ravel(), type=type.ravel(),
+                            conf=conf.ravel()), df.shape + (2,))
+    conf_int = estimate[..., None] - cutoffs[..., ::-1] * stderr[..., None]
+
+    return TTest(statistic=statistic[()], df=df[()], p_value=p_value[()],
+                 conf_int=conf_int, estimate=estimate[()], stderr=stderr[()])
+
+
+def _p_value(statistic, df, type):
+    """ p values of the t statistics for each type of alternative hypothesis
+    """
+    less = type == "less"
+    more = (type == "more") | (type == "greater")
+    lower = pt(statistic, df=df)
+    upper = pt(statistic, df=df, lowertail=False)
+    return np.where(less, lower,
+                    np.where(more, upper,
+                             np.minimum(2 * np.minimum(lower, upper), 1)))
+
+
+if __name__ == '__main__':
+    pass
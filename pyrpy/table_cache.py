@@ -0,0 +1,120 @@
+"""====================================================
+                    TABLE CACHE
+
+A least recently used cache of precomputed probability tables (eg the full
+pmf and cumulative tables of a discrete distribution for a given set of
+parameters), bounded by the total number of bytes the tables take up.
+=======================================================
+"""
+__author__ = 'Ronny Restrepo'
+
+from collections import OrderedDict
+from threading import Lock
+
+
+# ==============================================================================
+#                                                                    TABLE CACHE
+# ==============================================================================
+class TableCache(object):
+    """
+    LRU cache of tables, with a memory budget.
+
+    The cache is disabled (and stores nothing) until it is given a positive
+    memory budget, either when it is created, or later with `configure()`.
+
+    ARGS:
+    ---------------------
+    :param build (callable):
+        function that takes a key, and returns the tuple of numpy arrays
+        that should be cached for that key.
+    :param maxbytes (int):
+        memory budget in bytes. When adding a table would go over budget, the
+        least recently used tables get evicted first. Tables that are larger
+        than the entire budget are built but not stored.
+        A value of 0 (default) disables the cache.
+
+    EXAMPLES:
+    ---------------------
+    cache = TableCache(build_tables, maxbytes=64 * 2**20)
+    tables = cache.get((size, prob))
+    cache.info()
+    """
+    def __init__(self, build, maxbytes=0):
+        self._build = build
+        self._tables = OrderedDict()
+        self._lock = Lock()
+        self.maxbytes = 0
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.configure(maxbytes)
+
+    @property
+    def enabled(self):
+        return self.maxbytes > 0
+
+    def configure(self, maxbytes):
+        """ Sets the memory budget in bytes, evicting tables if the new budget
+            is smaller. A value of 0 (or None) disables and clears the cache.
+        """
+        maxbytes = int(maxbytes or 0)
+        if maxbytes < 0:
+            raise ValueError("maxbytes must be a non-negative integer")
+        with self._lock:
+            self.maxbytes = maxbytes
+            self._evict(0)
+
+    def get(self, key):
+        """ Returns the tables for key, building (and caching) them if they
+            are not in the cache already.
+        """
+        with self._lock:
+            tables = self._tables.get(key)
+            if tables is not None:
+                self._tables.move_to_end(key)
+                self.hits += 1
+                return tables
+            self.misses += 1
+
+        # Build outside of the lock, so other threads are not held up
+        tables = self._build(key)
+        nbytes = sum(table.nbytes for table in tables)
+        for table in tables:
+            table.setflags(write=False)   # Tables are shared between calls
+
+        with self._lock:
+            if nbytes <= self.maxbytes and key not in self._tables:
+                self._evict(nbytes)
+                self._tables[key] = tables
+                self.nbytes += nbytes
+        return tables
+
+    def clear(self):
+        """ Removes all the tables, and resets the statistics """
+        with self._lock:
+            self._tables.clear()
+            self.nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        """ Returns a dictionary with the hit/miss statistics and current
+            memory usage of the cache.
+        """
+        with self._lock:
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    "entries": len(self._tables),
+                    "nbytes": self.nbytes,
+                    "maxbytes": self.maxbytes,
+                    }
+
+    def _evict(self, nbytes):
+        """ Evicts least recently used tables until there is room for a new
+            table of `nbytes` bytes. Assumes the lock is held.
+        """
+        while self._tables and self.nbytes + nbytes > self.maxbytes:
+            _, tables = self._tables.popitem(last=False)
+            self.nbytes -= sum(table.nbytes for table in tables)
+            self.evictions += 1
@@ -0,0 +1,80 @@
+"""====================================================
+                    TAILS
+
+Helpers shared by the confidence region functions (cnorm, cbinom, ct, ...)
+=======================================================
+"""
+__author__ = 'Ronny Restrepo'
+
+import numpy as np
+
+TYPES = ("equal", "less", "more", "greater")
+
+
+# ==============================================================================
+#                                                                     TAIL_PROBS
+# ==============================================================================
+def tail_probs(type, conf):
+    """
+    Calculates the lower and upper probabilities that bound a confidence
+    region, for the given type of hypothesis test.
+
+    Both arguments can be scalars or arrays, in which case they are broadcast
+    against each other.
+
+    ARGS:
+    ---------------------
+    :param type (string or array of strings):
+        type of hypothesis test taken.
+           "equal" for two tailed test
+           "less" for one-tailed test where alternative hypotheis is 'less than'
+           "more" for one-tailed test where alternative hypotheis is 'more than'
+           "greater" same as "more"
+    :param conf (float or array of floats):
+        confidence interval used.
+
+    RETURN:
+    ---------------------
+    :return:
+        a tuple of two arrays (p_lower, p_upper)
+
+    RAISES:
+    ---------------------
+    ValueError if any of the values in type is not one of the accepted types.
+    """
+    # ==========================================================================
+    type = np.asarray(type)
+    conf = np.asarray(conf, dtype=float)
+    less = type == "less"
+    more = (type == "more") | (type == "greater")
+    equal = type == "equal"
+    known = less | more | equal
+    if not known.all():
+        unknown = np.unique(type[~known]).tolist()
+        raise ValueError("Unknown value(s) for type: {}. Must be one of {}"
+                         "".format(unknown, list(TYPES)))
+
+    # Account for the different types of cutoff quantiles
+    alpha = 1 - conf
+    p_lower = np.where(less, alpha, np.where(more, 0.0, alpha / 2))
+    p_upper = np.where(less, 1.0, np.where(more, conf, 1 - (alpha / 2)))
+    return p_lower, p_upper
+
+
+# ==============================================================================
+#                                                                     IS_BATCHED
+# ==============================================================================
+def is_batched(*args):
+    """ Returns True if any of the arguments are non-scalar (array like) """
+    return any(np.ndim(arg) > 0 for arg in args)
+
+
+# ==============================================================================
+#                                                                  STACK_REGIONS
+# ==============================================================================
+def stack_regions(lower, upper):
+    """ Broadcasts the lower and upper cutoffs against each other and stacks
+        them into a (k, 2) array
+    """
+    lower, upper = np.broadcast_arrays(lower, upper)
+    return np.stack([lower.ravel(), upper.ravel()], axis=-1)
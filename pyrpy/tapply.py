@@ -0,0 +1,327 @@
+"""====================================================
+                    TAPPLY
+
+Grouped summaries, like R's tapply() and aggregate(). The groups are
+factorized into integer codes (by sorting their unique values, or by counting
+them for integers within a small range), and the built in summaries (mean, sd,
+sum, length, min and max) are then computed for all of the groups at once, as
+segment reductions over those codes, without ever splitting the data into a
+separate array per group.
+
+Any other function is applied to each group in turn (as views of a single
+sorted copy of the data).
+=======================================================
+"""
+from __future__ import division, print_function, absolute_import
+
+import builtins
+from collections import namedtuple
+
+import numpy as np
+from pyrpy.instrument import instrument
+from pyrpy.mean import mean
+from pyrpy.sd import sd
+
+__author__ = 'Ronny Restrepo'
+
+Table = namedtuple("Table", ["levels", "values"])
+Aggregate = namedtuple("Aggregate", ["groups", "x"])
+
+# Names of the summaries computed as segment reductions, and the functions
+# that are recognised as being one of them.
+REDUCERS = ("mean", "sd", "sum", "length", "min", "max")
+_REDUCER_FUNCS = {
+    mean: "mean", np.mean: "mean", np.nanmean: "mean",
+    sd: "sd",
+    builtins.sum: "sum", np.sum: "sum", np.nansum: "sum",
+    len: "length", np.size: "length",
+    builtins.min: "min", np.min: "min", np.nanmin: "min",
+    builtins.max: "max", np.max: "max", np.nanmax: "max",
+}
+# The ones among them that ignore missing values (ie always use na_rm=True)
+_NAN_FUNCS = (np.nanmean, np.nansum, np.nanmin, np.nanmax)
+# The functions that compute the summaries, when they are given extra keyword
+# arguments (eg trim for the mean), which the segment reductions do not take
+_REDUCER_FALLBACKS = {"mean": mean, "sd": sd, "sum": np.sum,
+                      "length": np.size, "min": np.min, "max": np.max}
+
+
+# ==============================================================================
+#                                                                         TAPPLY
+# ==============================================================================
+@instrument
+def tapply(x, INDEX, FUN=None, na_rm=False, default=np.nan, **kwargs):
+    """
+    Applies a function to the values of x in each group (or each combination
+    of groups), like R's tapply().
+
+    ARGS:
+    ---------------------
+    :param x (array like):
+        The values to summarise.
+    :param INDEX (array like, or list of array likes):
+        The group of each value of x, or a list of several of these, in
+        which case every combination of their levels forms a group. Values
+        whose group is missing (nan or None) are left out.
+    :param FUN (str, function or None):
+        The function to apply to the values of each group. One of "mean",
+        "sd", "sum", "length", "min" or "max" (or the equivalent python,
+        numpy or pyrpy function, eg pyrpy.mean or np.max) is computed for
+        all of the groups at once, in a single vectorized pass. Any other
+        function is called on the values of each group in turn, along with
+        the extra keyword arguments.
+        If None, then returns the (1 based) group number of each value of x.
+    :param na_rm (bool):
+        Should missing values of x be removed before summarising?
+    :param default:
+        The value of the groups (ie combinations of levels) that have no
+        values at all.
+
+    RETURN:
+    ---------------------
+    :return: Table namedtuple with the attributes:
+                - levels: tuple of arrays of the (sorted) levels of each of
+                          the groupings in INDEX
+                - values: array with one dimension per grouping in INDEX, of
+                          the result for each combination of their levels.
+
+    EXAMPLES:
+    ---------------------
+    >>> tapply([1, 2, 3, 4, 5], ["a", "b", "a", "b", "b"], "mean")
+    Table(levels=(array(['a', 'b'], dtype='<U1'),), values=array([2., 3.66666667]))
+    """
+    # ==========================================================================
+    x = np.asarray(x)
+    code, levels, dims = _group(INDEX, len(x))
+    if FUN is None:
+        return np.where(code < 0, np.nan, code + 1)
+
+    keep = code >= 0
+    if not keep.all():
+        x, code = x[keep], code[keep]
+    ngroups = int(np.prod(dims))
+    values = _apply(x, code, ngroups, FUN, na_rm, kwargs)
+
+    empty = np.bincount(code, minlength=ngroups) == 0
+    if empty.any():
+        if values.dtype.kind in "iub" and not np.can_cast(
+                np.min_scalar_type(default), values.dtype):
+            values = values.astype(np.result_type(values, default))
+        values[empty] = default
+    return Table(levels=levels, values=values.reshape(dims))
+
+
+# ==============================================================================
+#                                                                      AGGREGATE
+# ==============================================================================
+@instrument
+def aggregate(x, by, FUN, na_rm=False, **kwargs):
+    """
+    Summarises the values of x in each group (or each combination of groups)
+    that occurs in the data, like R's aggregate().
+
+    ARGS:
+    ---------------------
+    :param x (array like):
+        The values to summarise. If 2D, then each column is summarised
+        separately.
+    :param by (array like, or list of array likes):
+        The group of each value (or row) of x, or a list of several of these.
+        Values whose group is missing (nan or None) are left out.
+    :param FUN (str or function):
+        The function to apply to the values of each group (see tapply()).
+    :param na_rm (bool):
+        Should missing values of x be removed before summarising?
+
+    RETURN:
+    ---------------------
+    :return: Aggregate namedtuple with the attributes:
+                - groups: tuple of arrays, with the levels of each of the
+                          groupings in `by`, for each group (one row per
+                          combination of levels that occurs, in sorted order)
+                - x:      array of the result for each group (with one column
+                          per column of x, if x is 2D)
+
+    EXAMPLES:
+    ---------------------
+    >>> aggregate([1, 2, 3, 4], by=[["a", "a", "b", "b"], [1, 2, 1, 1]],
+    ...           FUN="sum")
+    Aggregate(groups=(array(['a', 'a', 'b'], dtype='<U1'), array([1, 2, 1])), x=array([1., 2., 7.]))
+    """
+    # ==========================================================================
+    x = np.asarray(x)
+    if x.ndim not in (1, 2):
+        raise ValueError("'x' must be a vector, or a matrix")
+    code, levels, dims = _group(by, len(x))
+    keep = code >= 0
+    if not keep.all():
+        x, code = x[keep], code[keep]
+
+    # Only keep the combinations of levels that occur
+    code, present = _unique(code)
+    cells = np.unravel_index(present, dims)
+    groups = tuple(level[cell] for level, cell in zip(levels, cells))
+
+    if x.ndim == 1:
+        values = _apply(x, code, len(present), FUN, na_rm, kwargs)
+    else:
+        values = np.empty((len(present), x.shape[1]))
+        columns = [_apply(x[:, j], code, len(present), FUN, na_rm, kwargs)
+                   for j in range(x.shape[1])]
+        if columns:
+            values = np.column_stack(columns)
+    return Aggregate(groups=groups, x=values)
+
+
+# ==============================================================================
+#                                                                      FACTORIZE
+# ==============================================================================
+def _factorize(index):
+    """ Returns the integer code of each value of index (-1 where it is
+        missing), and the sorted levels.
+    """
+    index = np.asarray(index)
+    if index.dtype.kind == "f":
+        missing = np.isnan(index)
+    elif index.dtype.kind == "O":
+        missing = np.array([v is None or v != v for v in index], dtype=bool)
+    else:
+        missing = None
+
+    if missing is None or not missing.any():
+        return _unique(index)
+    code = np.full(len(index), -1, dtype=np.intp)
+    code[~missing], levels = _unique(index[~missing])
+    return code, levels
+
+
+def _unique(index):
+    """ Returns the integer code of each value of index, and the sorted
+        levels. Integers within a small range are counted, rather than sorted.
+    """
+    if index.dtype.kind in "iu" and len(index):
+        lo, hi = int(index.min()), int(index.max())
+        if hi - lo <= 2 * len(index) + 1024:
+            offset = index - lo if lo else index
+            present = np.bincount(offset, minlength=hi - lo + 1) > 0
+            levels = (np.flatnonzero(present) + lo).astype(index.dtype)
+            return (np.cumsum(present) - 1)[offset], levels
+    levels, code = np.unique(index, return_inverse=True)
+    return code.ravel(), levels
+
+
+def _group(INDEX, n):
+    """ Returns the combined group code of each of the n values (-1 where any
+        grouping is missing), the levels of each grouping, and the number of
+        levels of each grouping.
+    """
+    if isinstance(INDEX, (list, tuple)) and len(INDEX) > 0 \
+            and np.ndim(INDEX[0]) > 0:
+        indices = INDEX
+    else:
+        indices = [INDEX]
+
+    codes, levels = [], []
+    for index in indices:
+        code, level = _factorize(index)
+        if len(code) != n:
+            raise ValueError("arguments must have same length")
+        codes.append(code)
+        levels.append(level)
+    dims = tuple(len(level) for level in levels)
+
+    if len(codes) == 1:
+        return codes[0], tuple(levels), dims
+    missing = np.logical_or.reduce([code < 0 for code in codes])
+    code = np.ravel_multi_index([np.maximum(code, 0) for code in codes], dims)
+    code[missing] = -1
+    return code, tuple(levels), dims
+
+
+# ==============================================================================
+#                                                                         REDUCE
+# ==============================================================================
+def _apply(x, code, ngroups, FUN, na_rm, kwargs):
+    """ Result of FUN for the values of each of the ngroups groups """
+    how = FUN if isinstance(FUN, str) else _REDUCER_FUNCS.get(FUN)
+    if how is not None and not kwargs:
+        if how not in REDUCERS:
+            raise ValueError("FUN must be a function, or one of {}"
+                             "".format(REDUCERS))
+        return _reduce(x, code, ngroups, how, na_rm or FUN in _NAN_FUNCS)
+
+    if isinstance(FUN, str):
+        if FUN not in REDUCERS:
+            raise ValueError("FUN must be a function, or one of {}"
+                             "".format(REDUCERS))
+        FUN = _REDUCER_FALLBACKS[FUN]
+    if na_rm and x.dtype.kind in "fc":
+        keep = ~np.isnan(x)
+        x, code = x[keep], code[keep]
+    order = np.argsort(code, kind="stable")
+    counts = np.bincount(code, minlength=ngroups)
+    splits = np.split(x[order], np.cumsum(counts)[:-1])
+    results = [FUN(group, **kwargs) if len(group) else None
+               for group in splits]
+
+    filled = [r for r in results if r is not None]
+    if all(np.ndim(r) == 0 for r in filled):
+        try:
+            dtype = np.result_type(*filled) if filled else float
+            out = np.zeros(ngroups, dtype=dtype)
+            out[counts > 0] = filled
+            return out
+        except (TypeError, ValueError):
+            pass
+    out = np.empty(ngroups, dtype=object)
+    out[:] = results
+    return out
+
+
+def _reduce(x, code, ngroups, how, na_rm):
+    """ Segment reduction of x by the group codes, as a single vectorized
+        pass. Groups with no values get a count of 0, and a nan mean or sd.
+    """
+    if na_rm and x.dtype.kind in "fc":
+        keep = ~np.isnan(x)
+        if not keep.all():
+            x, code = x[keep], code[keep]
+    n = np.bincount(code, minlength=ngroups)
+    if how == "length":
+        return n
+
+    if how in ("min", "max"):
+        # Integers stay integers (like R), starting from the extremes of
+        # their type, rather than from +/-inf
+        if x.dtype.kind == "b":
+            x = x.astype(np.intp)
+        if x.dtype.kind in "iu":
+            info = np.iinfo(x.dtype)
+            out = np.full(ngroups, info.max if how == "min" else info.min,
+                          dtype=x.dtype)
+        else:
+            out = np.full(ngroups, np.inf if how == "min" else -np.inf)
+            out = out.astype(np.result_type(out, x), copy=False)
+        with np.errstate(invalid="ignore"):
+            (np.minimum if how == "min" else np.maximum).at(out, code, x)
+        return out
+
+    x = x.astype(float, copy=False)
+    total = np.bincount(code, weights=x, minlength=ngroups)
+    if how == "sum":
+        return total
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Second pass, that corrects the rounding errors of the first (like
+        # R's mean())
+        mu = total / n
+        mu += np.bincount(code, weights=x - mu[code], minlength=ngroups) / n
+        if how == "mean":
+            return mu
+        ss = np.bincount(code, weights=np.square(x - mu[code]),
+                         minlength=ngroups)
+        return np.where(n > 1, np.sqrt(ss / (n - 1)), np.nan)
+
+
+if __name__ == '__main__':
+    pass